@@ -4,12 +4,33 @@ Browser automation with anti-detection measures
 
 import asyncio
 import logging
-from typing import Optional, Dict
+import time
+from typing import Callable, Optional, Dict
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page
 from contextlib import asynccontextmanager
 
 logger = logging.getLogger(__name__)
 
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font", "stylesheet"})
+
+_LAUNCH_ARGS = [
+    "--disable-blink-features=AutomationControlled",
+    "--disable-dev-shm-usage",
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+    "--disable-web-security",
+    "--disable-features=IsolateOrigins,site-per-process"
+]
+
+# Injected into every page before site scripts run
+_STEALTH_JS = """
+    Object.defineProperties(navigator, {
+        webdriver: { get: () => undefined },
+        plugins: { get: () => [1, 2, 3, 4, 5] },
+        languages: { get: () => ['en-IN', 'en', 'hi'] }
+    });
+"""
+
 
 class BrowserController:
     """Manages Playwright browser with stealth mode"""
@@ -19,45 +40,31 @@ class BrowserController:
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
         self._playwright = None
+        
+        # Page pool (pages are reused across fetches)
+        self._pool: Optional[asyncio.Queue] = None
+        self._slots = asyncio.Semaphore(config.max_pages)
+        self._uses: Dict[Page, int] = {}
+        self._in_use = 0
+        self._waiting = 0
+        self._fetch_count = 0
+        self._context_ready = asyncio.Event()
+        self._context_lock = asyncio.Lock()
     
     async def initialize(self) -> None:
         """Initialize browser instance"""
         try:
             self._playwright = await async_playwright().start()
             
-            # Launch with anti-detection
-            self.browser = await self._playwright.chromium.launch(
-                headless=self.config.headless,
-                args=[
-                    "--disable-blink-features=AutomationControlled",
-                    "--disable-dev-shm-usage",
-                    "--no-sandbox",
-                    "--disable-setuid-sandbox",
-                    "--disable-web-security",
-                    "--disable-features=IsolateOrigins,site-per-process"
-                ]
-            )
-            
-            # Create stealth context
-            self.context = await self.browser.new_context(
-                user_agent=self.config.user_agent,
-                viewport={"width": 1920, "height": 1080},
-                locale="en-IN",
-                timezone_id="Asia/Kolkata",
-                permissions=["geolocation"],
-                geolocation={"latitude": 13.0827, "longitude": 80.2707},
-                extra_http_headers={
-                    "Accept-Language": "en-IN,en;q=0.9",
-                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8"
-                }
-            )
+            # Launch with anti-detection (a persistent profile launches
+            # together with its context in _open_context)
+            if not self.config.browser_profile_dir:
+                self.browser = await self._playwright.chromium.launch(
+                    headless=self.config.headless,
+                    args=_LAUNCH_ARGS
+                )
             
-            # Add stealth scripts
-            await self.context.add_init_script("""
-                Object.defineProperty(navigator, 'webdriver', { get: () => undefined });
-                Object.defineProperty(navigator, 'plugins', { get: () => [1, 2, 3, 4, 5] });
-                Object.defineProperty(navigator, 'languages', { get: () => ['en-IN', 'en', 'hi'] });
-            """)
+            await self._open_context()
             
             logger.info("Browser initialized")
             
@@ -65,6 +72,90 @@ class BrowserController:
             logger.error(f"Browser initialization failed: {e}")
             raise
     
+    async def _open_context(self) -> None:
+        """Create stealth context and a warm page pool"""
+        context_options = dict(
+            user_agent=self.config.user_agent,
+            viewport={"width": 1920, "height": 1080},
+            locale="en-IN",
+            timezone_id="Asia/Kolkata",
+            permissions=["geolocation"],
+            geolocation={"latitude": 13.0827, "longitude": 80.2707},
+            extra_http_headers={"Accept-Language": "en-IN,en;q=0.9"}
+        )
+        
+        if self.config.browser_profile_dir:
+            # On-disk profile keeps V8's code cache for district.in across restarts
+            self.context = await self._playwright.chromium.launch_persistent_context(
+                self.config.browser_profile_dir,
+                headless=self.config.headless,
+                args=_LAUNCH_ARGS,
+                **context_options
+            )
+        else:
+            self.context = await self.browser.new_context(**context_options)
+        
+        # Add stealth scripts
+        await self.context.add_init_script(_STEALTH_JS)
+        
+        # Skip assets the extractor never reads
+        await self.context.route("**/*", self._block_resources)
+        
+        self._pool = asyncio.Queue(maxsize=self.config.max_pages)
+        self._uses.clear()
+        self._fetch_count = 0
+        
+        # Persistent contexts start with a blank tab; pool it instead of leaking it
+        existing = self.context.pages[:self.config.max_pages]
+        for page in existing:
+            page.set_default_timeout(self.config.request_timeout)
+            self._uses[page] = 0
+            self._pool.put_nowait(page)
+        
+        # Pre-create the pool in one batch so early fetches don't pay for page creation
+        pages = await asyncio.gather(
+            *(self._new_page() for _ in range(self.config.max_pages - len(existing))),
+            return_exceptions=True
+        )
+        for page in pages:
+            if isinstance(page, BaseException):
+                logger.warning(f"Page warmup failed: {page}")
+            else:
+                self._pool.put_nowait(page)
+        
+        self._context_ready.set()
+    
+    async def _new_page(self) -> Page:
+        """Open a page in the current context"""
+        page = await self.context.new_page()
+        page.set_default_timeout(self.config.request_timeout)
+        self._uses[page] = 0
+        return page
+    
+    @staticmethod
+    async def _block_resources(route) -> None:
+        """Abort images, media, fonts and stylesheets"""
+        if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+            await route.abort()
+        else:
+            await route.continue_()
+    
+    async def _recycle_context(self) -> None:
+        """Close and reopen the context to release renderer memory"""
+        self._context_ready.clear()
+        logger.info(f"Recycling browser context after {self._fetch_count} fetches")
+        try:
+            await self.context.close()
+        except Exception as e:
+            logger.warning(f"Error closing context: {e}")
+        try:
+            await self._open_context()
+        except Exception as e:
+            # Retried by the next _acquire_page()
+            logger.error(f"Failed to reopen browser context: {e}")
+            self.context = None
+            self._context_ready.set()
+    
     async def close(self) -> None:
         """Clean up browser resources"""
         try:
@@ -78,20 +169,106 @@ class BrowserController:
         except Exception as e:
             logger.error(f"Error closing browser: {e}")
     
+    async def _acquire_page(self) -> Page:
+        """Take an idle page from the pool, or open one if none is idle"""
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        self._in_use += 1
+        
+        try:
+            await self._context_ready.wait()
+            if self.context is None:
+                async with self._context_lock:
+                    if self.context is None:
+                        await self._open_context()
+            
+            try:
+                return self._pool.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            
+            return await self._new_page()
+        except BaseException:
+            self._in_use -= 1
+            self._slots.release()
+            raise
+    
+    async def _discard_page(self, page: Page) -> None:
+        """Close a page and forget its use count"""
+        self._uses.pop(page, None)
+        try:
+            await page.close()
+        except Exception as e:
+            logger.debug(f"Error closing page: {e}")
+    
+    async def _release_page(self, page: Page, reusable: bool) -> None:
+        """Return a page to the pool, or close it once worn out"""
+        self._uses[page] = self._uses.get(page, 0) + 1
+        self._fetch_count += 1
+        
+        try:
+            if not reusable or page.is_closed() or self._uses[page] >= self.config.page_recycle_threshold:
+                await self._discard_page(page)
+            else:
+                try:
+                    # Drop DOM references held by the last document
+                    await page.goto("about:blank")
+                    self._pool.put_nowait(page)
+                except Exception:
+                    await self._discard_page(page)
+        finally:
+            self._in_use -= 1
+            self._slots.release()
+        
+        if (self._fetch_count >= self.config.context_recycle_threshold
+                and self._in_use == 0 and self._waiting == 0
+                and self._context_ready.is_set()):
+            await self._recycle_context()
+    
     @asynccontextmanager
     async def get_page(self):
-        """Context manager for page instances"""
-        page = None
+        """Context manager for pooled page instances"""
+        page = await self._acquire_page()
+        reusable = True
         try:
-            page = await self.context.new_page()
-            page.set_default_timeout(self.config.request_timeout)
             yield page
+        except BaseException:
+            reusable = False
+            raise
         finally:
-            if page:
-                await page.close()
+            await self._release_page(page, reusable)
     
-    async def fetch_page_content(self, url: str, wait_for_selector: Optional[str] = None) -> Dict:
-        """Fetch page content with error handling"""
+    @staticmethod
+    async def _wait_until_ready(page: Page, wait_for_selector: Optional[str] = None) -> bool:
+        """Wait for the selector (or __NEXT_DATA__) to appear; False on timeout"""
+        try:
+            if wait_for_selector:
+                await page.wait_for_selector(wait_for_selector, timeout=10000)
+            else:
+                await page.wait_for_function(
+                    "() => document.getElementById('__NEXT_DATA__') !== null",
+                    timeout=5000
+                )
+            return True
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            return False
+    
+    async def fetch_page_content(
+        self,
+        url: str,
+        wait_for_selector: Optional[str] = None,
+        need_html: bool = False
+    ) -> Dict:
+        """Fetch page content with error handling
+        
+        The full HTML is only serialized when __NEXT_DATA__ is missing
+        or need_html is set.
+        """
         result = {
             "success": False,
             "content": None,
@@ -104,41 +281,73 @@ class BrowserController:
             try:
                 logger.debug(f"Fetching: {url}")
                 
-                response = await page.goto(
-                    url,
-                    wait_until="domcontentloaded",
-                    timeout=self.config.request_timeout
-                )
+                # The main document's status, in case readiness wins the
+                # race and goto() is cancelled before returning it
+                navigation = {}
                 
-                result["status_code"] = response.status if response else None
+                def on_response(response):
+                    if (response.frame == page.main_frame
+                            and response.request.is_navigation_request()):
+                        navigation["status"] = response.status
                 
-                if response and response.status == 403:
-                    result["error"] = "Access denied (403) - possible IP block"
-                    logger.warning(result["error"])
-                    return result
+                page.on("response", on_response)
                 
-                # Wait for dynamic content
-                await asyncio.sleep(2)
+                # Start navigating and watching for content together so
+                # extraction can begin as soon as __NEXT_DATA__ exists,
+                # even before domcontentloaded fires
+                goto_task = asyncio.create_task(page.goto(
+                    url,
+                    wait_until="domcontentloaded",
+                    timeout=self.config.request_timeout
+                ))
+                ready_task = asyncio.create_task(self._wait_until_ready(page, wait_for_selector))
                 
-                if wait_for_selector:
-                    try:
-                        await page.wait_for_selector(wait_for_selector, timeout=10000)
-                    except:
-                        pass
+                try:
+                    done, _ = await asyncio.wait(
+                        {goto_task, ready_task},
+                        return_when=asyncio.FIRST_COMPLETED
+                    )
+                    
+                    navigated = goto_task in done or not ready_task.result()
+                    if navigated:
+                        response = await goto_task
+                        result["status_code"] = response.status if response else None
+                    else:
+                        result["status_code"] = navigation.get("status")
+                    
+                    # Error pages can still carry __NEXT_DATA__, so check
+                    # the status whichever task finished first
+                    if result["status_code"] == 403:
+                        result["error"] = "Access denied (403) - possible IP block"
+                        logger.warning(result["error"])
+                        return result
+                    
+                    if navigated:
+                        # Wait for dynamic content
+                        await ready_task
+                finally:
+                    page.remove_listener("response", on_response)
+                    pending = [t for t in (goto_task, ready_task) if not t.done()]
+                    for task in pending:
+                        task.cancel()
+                    if pending:
+                        await asyncio.gather(*pending, return_exceptions=True)
                 
-                # Extract __NEXT_DATA__
-                next_data = await page.evaluate("""
-                    () => {
-                        const script = document.querySelector('#__NEXT_DATA__');
-                        return script ? script.textContent : null;
+                # Extract __NEXT_DATA__ (and HTML if needed) in one round-trip
+                data = await page.evaluate("""
+                    (needHtml) => {
+                        const script = document.getElementById('__NEXT_DATA__');
+                        const next = script ? script.textContent : null;
+                        return {
+                            next: next,
+                            html: (needHtml || next === null) ? document.documentElement.outerHTML : null
+                        };
                     }
-                """)
-                
-                html = await page.content()
+                """, need_html)
                 
                 result["success"] = True
-                result["content"] = next_data
-                result["html"] = html
+                result["content"] = data["next"]
+                result["html"] = data["html"]
                 
                 logger.debug(f"Fetched successfully (status: {result['status_code']})")
                 
@@ -155,12 +364,20 @@ class BrowserController:
 class CircuitBreaker:
     """Circuit breaker to prevent cascading failures"""
     
-    def __init__(self, threshold: int = 5, timeout: int = 300):
+    __slots__ = ("threshold", "timeout", "failures", "last_failure_time", "state", "_now")
+    
+    def __init__(
+        self,
+        threshold: int = 5,
+        timeout: int = 300,
+        clock: Callable[[], float] = time.monotonic
+    ):
         self.threshold = threshold
         self.timeout = timeout
         self.failures = 0
-        self.last_failure_time = 0
+        self.last_failure_time = 0.0
         self.state = "CLOSED"
+        self._now = clock  # Injectable for deterministic tests
     
     def record_success(self) -> None:
         """Reset on success"""
@@ -170,7 +387,7 @@ class CircuitBreaker:
     def record_failure(self) -> None:
         """Record failure"""
         self.failures += 1
-        self.last_failure_time = asyncio.get_event_loop().time()
+        self.last_failure_time = self._now()
         
         if self.failures >= self.threshold:
             self.state = "OPEN"
@@ -182,8 +399,7 @@ class CircuitBreaker:
             return True
         
         if self.state == "OPEN":
-            current_time = asyncio.get_event_loop().time()
-            if current_time - self.last_failure_time >= self.timeout:
+            if self._now() - self.last_failure_time >= self.timeout:
                 self.state = "HALF_OPEN"
                 logger.info("Circuit breaker HALF_OPEN")
                 return True
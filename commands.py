@@ -2,122 +2,377 @@
 Telegram command handler for dynamic movie/theatre management
 """
 
+import asyncio
+import collections
+import io
 import logging
-from typing import Optional, Dict, List
+import re
+import sys
+import time
+import weakref
+import aiohttp
+from aiohttp import web
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from operator import attrgetter
+from typing import Optional, Dict, Iterator, List
 from datetime import datetime
 
+from config import TheaterConfig
+from extractor import DataExtractor, format_available_times
+from notifier import TELEGRAM_MAX_LENGTH
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Chat that sent the update being handled; per-task so updates can be
+# dispatched concurrently
+_current_chat_id: ContextVar[Optional[str]] = ContextVar("current_chat_id", default=None)
+_is_admin_var: ContextVar[Optional[bool]] = ContextVar("is_admin", default=None)
+
+_KNOWN_CITIES = frozenset({
+    'chennai', 'bangalore', 'bengaluru', 'hyderabad', 'mumbai',
+    'delhi', 'pune', 'kolkata', 'kochi', 'coimbatore'
+})
+
+# City as a whole word anywhere in the URL (path segment or slug part);
+# lookarounds rather than \b so '_' also separates words
+_CITY_RE = re.compile(
+    r'(?<![a-z0-9])(' + '|'.join(sorted(_KNOWN_CITIES)) + r')(?![a-z0-9])',
+    re.IGNORECASE
+)
+
+# Accepted /add URL prefixes (lowercased), with or without scheme and www
+_VALID_URL_PREFIXES = tuple(
+    f"{scheme}{host}/{section}/"
+    for scheme in ("https://", "http://", "")
+    for host in ("district.in", "www.district.in")
+    for section in ("movies", "events")
+)
+
+# Replies sent within this window (seconds) are merged into one message
+REPLY_FLUSH_DELAY = 0.2
+
+# Seconds a fetched movie page is reused by back-to-back /addtheater calls
+PAGE_CACHE_TTL = 30
+
+_PRIORITY_KEY = attrgetter('priority')
+_STARS = tuple("⭐" * i for i in range(11))
+
+
+def _stars(priority: int) -> str:
+    """Star rating for a theater priority"""
+    if 0 <= priority < len(_STARS):
+        return _STARS[priority]
+    return "⭐" * priority
+
+
+def _render_movie_list(movies: List[Dict]) -> Iterator[str]:
+    """Yield the /list reply one line at a time"""
+    yield "📽️ *Configured Movies*"
+    for idx, m in enumerate(movies, 1):
+        status = "✅" if m['enabled'] else "⏸️"
+        yield ""
+        yield f"{idx}. {status} *{m['name']}* ({m['city']})"
+        yield f"   🆔 `{m['id']}`"
+        yield f"   🎭 {m['theaters']} theaters"
+    yield ""
+    yield ""
+    yield "💡 Use `/theaters <id>` to view/edit theaters"
+
+
+# [minute, formatted time]; the status timestamp only changes once a minute
+_TS_CACHE = [0, ""]
+
+
+def _minute_timestamp() -> str:
+    """Current time as shown in /status, formatted at most once per minute"""
+    now = time.time()
+    minute = int(now // 60)
+    if minute != _TS_CACHE[0]:
+        _TS_CACHE[:] = [minute, datetime.fromtimestamp(now).strftime('%I:%M %p, %d %b %Y')]
+    return _TS_CACHE[1]
+
+
+# Command -> CommandHandler method name
+_COMMAND_TABLE = {
+    sys.intern(command): name for command, name in (
+        ('/start', 'cmd_start'),
+        ('/help', 'cmd_help'),
+        ('/add', 'cmd_add'),
+        ('/remove', 'cmd_remove'),
+        ('/list', 'cmd_list'),
+        ('/enable', 'cmd_enable'),
+        ('/disable', 'cmd_disable'),
+        ('/status', 'cmd_status'),
+        ('/theaters', 'cmd_theaters'),
+        ('/addtheater', 'cmd_add_theater'),
+        ('/removetheater', 'cmd_remove_theater'),
+        ('/register', 'cmd_register'),
+        ('/unregister', 'cmd_unregister'),
+        ('/users', 'cmd_users'),
+    )
+}
+
+# Static replies, built once at import
+_WELCOME_NEW = (
+    "🎬 *Welcome to DistrictWatch!*\n\n"
+    "✅ You're now registered for booking alerts!\n\n"
+    "I monitor movie bookings on District.in and send instant alerts.\n\n"
+    "*Quick Start:*\n"
+    "1️⃣ Add a movie: `/add <url> <name> <city>`\n"
+    "2️⃣ View movies: `/list`\n"
+    "3️⃣ Manage theaters: `/theaters <movie_id>`\n\n"
+    "Use /help for all commands."
+)
+
+_WELCOME_BACK = (
+    "🎬 *Welcome back to DistrictWatch!*\n\n"
+    "You're already registered for alerts.\n\n"
+    "Use /help for all commands."
+)
+
+_HELP_USER = (
+    "📚 *DistrictWatch Commands*\n\n"
+    "*👤 User Commands:*\n"
+    "`/register` - Subscribe to alerts\n"
+    "`/unregister` - Unsubscribe from alerts\n"
+    "`/status` - System status\n"
+    "`/help` - This help message\n\n"
+)
+
+_HELP_ADMIN = _HELP_USER + (
+    "*🎬 Movie Management (Admin):*\n"
+    "`/add <url> <name> [city]` - Add movie\n"
+    "`/remove <id>` - Remove movie\n"
+    "`/list` - List all movies\n"
+    "`/enable <id>` - Enable monitoring\n"
+    "`/disable <id>` - Pause monitoring\n\n"
+    "*🎭 Theater Management (Admin):*\n"
+    "`/theaters <id>` - Show movie's theaters\n"
+    "`/addtheater <id> <name>` - Add theater\n"
+    "`/removetheater <id> <name>` - Remove theater\n\n"
+    "*👥 User Management (Admin):*\n"
+    "`/users` - List registered users\n"
+)
+
+
+def _utf16_len(text: str) -> int:
+    """Length as Telegram counts it (UTF-16 code units; emoji take two)"""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _utf16_head(text: str, limit: int) -> str:
+    """Longest prefix of text within limit UTF-16 code units"""
+    head = text.encode("utf-16-le")[:limit * 2]
+    # Don't end on the first half of a surrogate pair
+    if len(head) >= 2 and 0xD8 <= head[-1] <= 0xDB:
+        head = head[:-2]
+    return head.decode("utf-16-le")
+
+
+def _pack_replies(replies: List[str], limit: int = TELEGRAM_MAX_LENGTH) -> List[str]:
+    """Join replies with blank lines into as few messages as fit the limit"""
+    pieces = []
+    for reply in replies:
+        size = _utf16_len(reply)
+        if size <= limit:
+            pieces.append((reply, size))
+            continue
+        # Oversized reply: break on paragraphs, hard-split what's still too long
+        for paragraph in reply.split("\n\n"):
+            while _utf16_len(paragraph) > limit:
+                head = _utf16_head(paragraph, limit)
+                pieces.append((head, _utf16_len(head)))
+                paragraph = paragraph[len(head):]
+            pieces.append((paragraph, _utf16_len(paragraph)))
+    
+    messages = []
+    current = ""
+    current_size = 0
+    for piece, size in pieces:
+        if not current:
+            current, current_size = piece, size
+        elif current_size + 2 + size <= limit:
+            current += "\n\n" + piece
+            current_size += 2 + size
+        else:
+            messages.append(current)
+            current, current_size = piece, size
+    if current:
+        messages.append(current)
+    return messages
+
 
 class CommandHandler:
     """Handle Telegram bot commands"""
     
+    __slots__ = ("config", "notifier", "browser", "_pending", "_flush_tasks", "_cpu_pool",
+                 "_page_cache", "_chat_locks", "_send_locks")
+    
     def __init__(self, config, notifier, browser=None):
         self.config = config
         self.notifier = notifier
         self.browser = browser  # For immediate availability checks
-        self.current_chat_id = None  # Track who sent the command
-        self.commands = {
-            '/start': self.cmd_start,
-            '/help': self.cmd_help,
-            '/add': self.cmd_add,
-            '/remove': self.cmd_remove,
-            '/list': self.cmd_list,
-            '/enable': self.cmd_enable,
-            '/disable': self.cmd_disable,
-            '/status': self.cmd_status,
-            '/theaters': self.cmd_theaters,
-            '/addtheater': self.cmd_add_theater,
-            '/removetheater': self.cmd_remove_theater,
-            '/register': self.cmd_register,
-            '/unregister': self.cmd_unregister,
-            '/users': self.cmd_users,
-        }
+        
+        # Outgoing replies waiting for their chat's flush window
+        self._pending: Dict[str, List[str]] = {}
+        self._flush_tasks: Dict[str, asyncio.Task] = {}
+        
+        # Page parsing runs here so one /addtheater can't stall other chats
+        self._cpu_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="extract")
+        
+        # movie_url -> (fetched_at, page_result)
+        self._page_cache: Dict[str, tuple] = {}
+        
+        # Per-chat locks, so one chat's commands run in the order sent
+        # (an entry lives only while a command from that chat holds it)
+        self._chat_locks: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+        # Likewise for sends, so one flush window's messages all go out
+        # before the next window's (separate from _chat_locks, which a
+        # long command holds while its progress replies should still go out)
+        self._send_locks: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+    
+    async def _fetch_movie_page(self, url: str) -> Dict:
+        """Fetch a movie page, reusing a recent successful fetch"""
+        now = time.monotonic()
+        # Drop expired entries first; each holds a full page of HTML
+        for key in [k for k, (ts, _) in self._page_cache.items() if now - ts >= PAGE_CACHE_TTL]:
+            del self._page_cache[key]
+        
+        cached = self._page_cache.get(url)
+        if cached:
+            return cached[1]
+        
+        page_result = await self.browser.fetch_page_content(url, need_html=True)
+        if page_result.get("success"):
+            fetched_at = time.monotonic()
+            self._page_cache[url] = (fetched_at, page_result)
+            # Also expire it on time if no later fetch comes along to prune it
+            asyncio.get_running_loop().call_later(PAGE_CACHE_TTL, self._expire_page, url, fetched_at)
+        return page_result
+    
+    def _expire_page(self, url: str, fetched_at: float) -> None:
+        """Drop a cached page unless it has since been refetched"""
+        cached = self._page_cache.get(url)
+        if cached and cached[0] == fetched_at:
+            del self._page_cache[url]
+    
+    def close(self) -> None:
+        """Release the parsing thread pool"""
+        self._cpu_pool.shutdown(wait=False)
+    
+    @property
+    def current_chat_id(self) -> Optional[str]:
+        """Chat ID of the user who sent the current command"""
+        return _current_chat_id.get()
+    
+    @current_chat_id.setter
+    def current_chat_id(self, chat_id: Optional[str]) -> None:
+        _current_chat_id.set(chat_id)
+        _is_admin_var.set(None)
+    
+    def _is_admin(self) -> bool:
+        """Whether the current sender is the admin (checked once per update)"""
+        is_admin = _is_admin_var.get()
+        if is_admin is None:
+            is_admin = self.config.is_admin(self.current_chat_id)
+            _is_admin_var.set(is_admin)
+        return is_admin
     
     async def handle_update(self, update: Dict) -> None:
         """Process incoming Telegram update"""
+        message = update.get('message') or {}
+        text = (message.get('text') or '').strip()
+        chat = message.get('chat') or {}
+        self.current_chat_id = str(chat.get('id', ''))
+        
+        if not text or not text.startswith('/'):
+            return
+        
+        lock = self._chat_locks.get(self.current_chat_id)
+        if lock is None:
+            lock = self._chat_locks[self.current_chat_id] = asyncio.Lock()
+        async with lock:
+            await self._dispatch(text)
+    
+    async def _dispatch(self, text: str) -> None:
+        """Parse a command message and run its handler"""
+        # Parse command and arguments in one pass (no intermediate lists)
+        space = text.find(' ')
+        cmd_end = len(text) if space == -1 else space
+        at_sign = text.find('@', 0, cmd_end)  # Strip @botname suffix
+        command = text[:cmd_end if at_sign == -1 else at_sign].lower()
+        args = text[space + 1:].lstrip() if space != -1 else ""
+        
+        name = _COMMAND_TABLE.get(command)
+        if name is None:
+            await self.send_reply(f"❌ Unknown command: {command}\nUse /help for available commands")
+            return
+        
         try:
-            message = update.get('message', {})
-            text = message.get('text', '').strip()
-            chat = message.get('chat', {})
-            self.current_chat_id = str(chat.get('id', ''))
-            
-            if not text or not text.startswith('/'):
-                return
-            
-            # Parse command and arguments
-            parts = text.split(maxsplit=1)
-            command = parts[0].lower().split('@')[0]  # Remove @botname suffix
-            args = parts[1] if len(parts) > 1 else ""
-            
-            handler = self.commands.get(command)
-            if handler:
-                await handler(args)
-            else:
-                await self.send_reply(f"❌ Unknown command: {command}\nUse /help for available commands")
-                
-        except Exception as e:
-            logger.error(f"Error handling command: {e}")
-            await self.send_reply(f"❌ Error: {str(e)}")
+            await getattr(self, name)(args)
+        except Exception:
+            # Details go to the log, not to the chat
+            logger.exception("Error handling %s", command)
+            await self.send_reply("❌ Something went wrong. Please try again later.")
     
     async def send_reply(self, text: str) -> None:
-        """Send reply to the user who sent the command"""
+        """Queue a reply to the user who sent the command
+        
+        Replies to the same chat within REPLY_FLUSH_DELAY are sent as
+        one message (split only when over Telegram's length limit).
+        """
         chat_id = self.current_chat_id or self.config.telegram_chat_id
-        await self.notifier.send_message(text, chat_id=chat_id)
+        self._pending.setdefault(chat_id, []).append(text)
+        
+        if chat_id not in self._flush_tasks:
+            self._flush_tasks[chat_id] = asyncio.create_task(self._flush_after(chat_id))
+    
+    async def _flush_after(self, chat_id: str, delay: float = REPLY_FLUSH_DELAY) -> None:
+        """Send everything queued for a chat after the flush window"""
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            # Replies queued from here on start a new window
+            self._flush_tasks.pop(chat_id, None)
+        
+        await self._send_pending(chat_id)
+    
+    async def _send_pending(self, chat_id: str) -> None:
+        """Send a chat's queued replies, after any earlier window's send finishes"""
+        lock = self._send_locks.get(chat_id)
+        if lock is None:
+            lock = self._send_locks[chat_id] = asyncio.Lock()
+        async with lock:
+            for message in _pack_replies(self._pending.pop(chat_id, [])):
+                await self.notifier.send_message(message, chat_id=chat_id)
+    
+    async def flush_replies(self) -> None:
+        """Send every queued reply now, without waiting out the flush windows"""
+        tasks = list(self._flush_tasks.values())
+        self._flush_tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        
+        # Cancelled windows leave their replies queued
+        for chat_id in list(self._pending):
+            await self._send_pending(chat_id)
     
     async def cmd_start(self, args: str) -> None:
         """Welcome message and auto-register"""
         # Auto-register user on /start
         is_new = self.config.register_user(self.current_chat_id)
-        
-        if is_new:
-            await self.send_reply(
-                "🎬 *Welcome to DistrictWatch!*\n\n"
-                "✅ You're now registered for booking alerts!\n\n"
-                "I monitor movie bookings on District.in and send instant alerts.\n\n"
-                "*Quick Start:*\n"
-                "1️⃣ Add a movie: `/add <url> <name> <city>`\n"
-                "2️⃣ View movies: `/list`\n"
-                "3️⃣ Manage theaters: `/theaters <movie_id>`\n\n"
-                "Use /help for all commands."
-            )
-        else:
-            await self.send_reply(
-                "🎬 *Welcome back to DistrictWatch!*\n\n"
-                "You're already registered for alerts.\n\n"
-                "Use /help for all commands."
-            )
+        await self.send_reply(_WELCOME_NEW if is_new else _WELCOME_BACK)
     
     async def cmd_help(self, args: str) -> None:
         """Show all commands"""
-        is_admin = self.config.is_admin(self.current_chat_id)
-        
-        msg = (
-            "📚 *DistrictWatch Commands*\n\n"
-            "*👤 User Commands:*\n"
-            "`/register` - Subscribe to alerts\n"
-            "`/unregister` - Unsubscribe from alerts\n"
-            "`/status` - System status\n"
-            "`/help` - This help message\n\n"
-        )
-        
-        if is_admin:
-            msg += (
-                "*🎬 Movie Management (Admin):*\n"
-                "`/add <url> <name> [city]` - Add movie\n"
-                "`/remove <id>` - Remove movie\n"
-                "`/list` - List all movies\n"
-                "`/enable <id>` - Enable monitoring\n"
-                "`/disable <id>` - Pause monitoring\n\n"
-                "*🎭 Theater Management (Admin):*\n"
-                "`/theaters <id>` - Show movie's theaters\n"
-                "`/addtheater <id> <name>` - Add theater\n"
-                "`/removetheater <id> <name>` - Remove theater\n\n"
-                "*👥 User Management (Admin):*\n"
-                "`/users` - List registered users\n"
-            )
-        
-        await self.send_reply(msg)
+        await self.send_reply(_HELP_ADMIN if self._is_admin() else _HELP_USER)
     
     async def cmd_add(self, args: str) -> None:
         """Add a movie"""
@@ -139,24 +394,18 @@ class CommandHandler:
             url = parts[0]
             
             # Validate URL
-            if not ("district.in/movies/" in url or "district.in/events/" in url):
+            if not url.lower().startswith(_VALID_URL_PREFIXES):
                 await self.send_reply("❌ Invalid URL. Must be from district.in")
                 return
             
             # Detect city from last word or URL
-            known_cities = ['chennai', 'bangalore', 'bengaluru', 'hyderabad', 'mumbai', 
-                          'delhi', 'pune', 'kolkata', 'kochi', 'coimbatore']
-            
-            if parts[-1].lower() in known_cities:
+            if parts[-1].lower() in _KNOWN_CITIES:
                 city = parts[-1].capitalize()
                 name = ' '.join(parts[1:-1])
             else:
                 # Try to extract city from URL
-                city = "Chennai"
-                for c in known_cities:
-                    if c in url.lower():
-                        city = c.capitalize()
-                        break
+                match = _CITY_RE.search(url)
+                city = match.group(1).capitalize() if match else "Chennai"
                 name = ' '.join(parts[1:])
             
             if not name:
@@ -211,18 +460,7 @@ class CommandHandler:
             )
             return
         
-        lines = ["📽️ *Configured Movies*\n"]
-        
-        for idx, m in enumerate(movies, 1):
-            status = "✅" if m['enabled'] else "⏸️"
-            lines.append(
-                f"{idx}. {status} *{m['name']}* ({m['city']})\n"
-                f"   🆔 `{m['id']}`\n"
-                f"   🎭 {m['theaters']} theaters\n"
-            )
-        
-        lines.append("\n💡 Use `/theaters <id>` to view/edit theaters")
-        await self.send_reply('\n'.join(lines))
+        await self.send_reply("\n".join(_render_movie_list(movies)))
     
     async def cmd_enable(self, args: str) -> None:
         """Enable movie"""
@@ -264,30 +502,29 @@ class CommandHandler:
         total = len(self.config.movies)
         users = len(self.config.registered_users)
         
-        msg = (
-            "📊 *System Status*\n\n"
-            f"📽️ Active movies: {len(active)}/{total}\n"
-            f"👥 Registered users: {users}\n"
-            f"🎭 Default theaters: {len(self.config.default_theaters)}\n"
-            f"⏱️ Check interval: {self.config.check_interval}s\n\n"
-        )
+        lines = [
+            "📊 *System Status*\n",
+            f"📽️ Active movies: {len(active)}/{total}",
+            f"👥 Registered users: {users}",
+            f"🎭 Default theaters: {len(self.config.default_theaters)}",
+            f"⏱️ Check interval: {self.config.check_interval}s\n",
+        ]
         
         if active:
-            msg += "*Currently Monitoring:*\n"
-            for m in active[:5]:
-                msg += f"• {m.movie_name} ({m.city})\n"
+            lines.append("*Currently Monitoring:*")
+            lines.extend(f"• {m.movie_name} ({m.city})" for m in active[:5])
             if len(active) > 5:
-                msg += f"• ... and {len(active) - 5} more\n"
+                lines.append(f"• ... and {len(active) - 5} more")
         else:
-            msg += "_No movies being monitored_\n"
+            lines.append("_No movies being monitored_")
         
         # Show registration status for user
         is_registered = self.config.is_registered(self.current_chat_id)
         status = "✅ Registered" if is_registered else "❌ Not registered"
-        msg += f"\n*Your status:* {status}\n"
+        lines.append(f"\n*Your status:* {status}\n")
         
-        msg += f"\n⏰ {datetime.now().strftime('%I:%M %p, %d %b %Y')}"
-        await self.send_reply(msg)
+        lines.append(f"⏰ {_minute_timestamp()}")
+        await self.send_reply("\n".join(lines))
     
     async def cmd_register(self, args: str) -> None:
         """Register for alerts"""
@@ -304,7 +541,7 @@ class CommandHandler:
     async def cmd_unregister(self, args: str) -> None:
         """Unregister from alerts"""
         # Don't allow admin to unregister
-        if self.config.is_admin(self.current_chat_id):
+        if self._is_admin():
             await self.send_reply("⚠️ Admin cannot unregister. You'll always receive alerts.")
             return
         
@@ -320,7 +557,7 @@ class CommandHandler:
     
     async def cmd_users(self, args: str) -> None:
         """List registered users (admin only)"""
-        if not self.config.is_admin(self.current_chat_id):
+        if not self._is_admin():
             await self.send_reply("❌ This command is only available to the admin.")
             return
         
@@ -330,12 +567,12 @@ class CommandHandler:
             await self.send_reply("👥 No users registered.")
             return
         
-        msg = f"👥 *Registered Users ({len(users)})*\n\n"
+        lines = [f"👥 *Registered Users ({len(users)})*\n"]
         for idx, user_id in enumerate(users, 1):
-            is_admin = "�" if self.config.is_admin(user_id) else ""
-            msg += f"{idx}. `{user_id}` {is_admin}\n"
+            crown = "\U0001F451" if self.config.is_admin(user_id) else ""
+            lines.append(f"{idx}. `{user_id}` {crown}")
         
-        await self.send_reply(msg)
+        await self.send_reply("\n".join(lines) + "\n")
     
     async def cmd_theaters(self, args: str) -> None:
         """Show theaters for a movie"""
@@ -361,25 +598,25 @@ class CommandHandler:
             )
             return
         
-        lines = [f"🎭 *Theaters for {movie.movie_name}*\n"]
+        buf = io.StringIO()
+        buf.write(f"🎭 *Theaters for {movie.movie_name}*\n")
         
-        sorted_theaters = sorted(movie.target_theaters, key=lambda t: t.priority)
-        for t in sorted_theaters:
-            stars = "⭐" * t.priority
-            keywords = ", ".join(t.keywords)
-            lines.append(f"{stars} *{t.name}*\n   Keywords: _{keywords}_\n")
+        write = buf.write
+        for t in sorted(movie.target_theaters, key=_PRIORITY_KEY):
+            write(f"\n{_stars(t.priority)} *{t.name}*\n   Keywords: _{', '.join(t.keywords)}_\n")
         
-        lines.append(
-            f"\n💡 *Commands:*\n"
+        buf.write(
+            f"\n\n💡 *Commands:*\n"
             f"`/addtheater {movie_id} <name>`\n"
             f"`/removetheater {movie_id} <name>`"
         )
         
-        await self.send_reply('\n'.join(lines))
+        await self.send_reply(buf.getvalue())
     
     async def cmd_add_theater(self, args: str) -> None:
         """Add theater to a movie with instant availability check"""
-        if not args or len(args.split(maxsplit=1)) < 2:
+        parts = args.split(maxsplit=1)
+        if len(parts) < 2:
             await self.send_reply(
                 "❌ *Usage:* `/addtheater <movie_id> <theater_name>`\n\n"
                 "*Example:*\n"
@@ -387,7 +624,6 @@ class CommandHandler:
             )
             return
         
-        parts = args.split(maxsplit=1)
         movie_id = parts[0].strip().lower()
         theater_name = parts[1].strip()
         
@@ -396,7 +632,6 @@ class CommandHandler:
             await self.send_reply(f"❌ Movie not found: `{movie_id}`")
             return
         
-        from config import TheaterConfig
         theater = TheaterConfig(
             name=theater_name,
             priority=1,
@@ -410,7 +645,6 @@ class CommandHandler:
         logger.info(f"Theater added to {movie_id}: {theater_name}")
         
         # Check current availability for this theater immediately
-        availability_msg = ""
         if self.browser:
             try:
                 await self.send_reply(
@@ -421,37 +655,32 @@ class CommandHandler:
                 )
                 
                 # Fetch page and check availability
-                from extractor import DataExtractor
-                page_result = await self.browser.fetch_page_content(movie.movie_url)
+                page_result = await self._fetch_movie_page(movie.movie_url)
                 
                 if page_result.get("success"):
                     extractor = DataExtractor([theater])
-                    extraction = extractor.process_page_data(page_result)
+                    extraction = await asyncio.get_running_loop().run_in_executor(
+                        self._cpu_pool, extractor.process_page_data, page_result
+                    )
                     
                     if extraction.get("success") and extraction.get("theaters"):
                         found_theaters = extraction["theaters"]
                         
                         # Build availability message
-                        availability_msg = (
+                        parts = [
                             "🎉 *BOOKINGS ALREADY OPEN!*\n\n"
                             f"🎬 {movie.movie_name}\n"
                             f"🎭 {theater_name}\n\n"
-                        )
+                        ]
                         
                         for t in found_theaters:
-                            available = [st for st in t.showtimes if st.available]
-                            if available:
-                                times = [st.time for st in available[:6]]
-                                time_str = ", ".join(times)
-                                if len(available) > 6:
-                                    time_str += f" +{len(available) - 6} more"
-                                availability_msg += f"🕐 *Available times:* {time_str}\n"
+                            time_str = format_available_times(t.showtimes)
+                            if time_str:
+                                parts.append(f"🕐 *Available times:* {time_str}\n")
                         
-                        availability_msg += (
-                            f"\n🔗 [Book Now]({movie.movie_url})"
-                        )
+                        parts.append(f"\n🔗 [Book Now]({movie.movie_url})")
                         
-                        await self.send_reply(availability_msg)
+                        await self.send_reply("".join(parts))
                         return
                 
                 # No availability found
@@ -476,7 +705,8 @@ class CommandHandler:
     
     async def cmd_remove_theater(self, args: str) -> None:
         """Remove theater from a movie"""
-        if not args or len(args.split(maxsplit=1)) < 2:
+        parts = args.split(maxsplit=1)
+        if len(parts) < 2:
             await self.send_reply(
                 "❌ *Usage:* `/removetheater <movie_id> <theater_name>`\n\n"
                 "*Example:*\n"
@@ -484,7 +714,6 @@ class CommandHandler:
             )
             return
         
-        parts = args.split(maxsplit=1)
         movie_id = parts[0].strip().lower()
         theater_name = parts[1].strip()
         
@@ -504,18 +733,54 @@ class CommandHandler:
             await self.send_reply(f"❌ Theater not found: {theater_name}")
 
 
+class _RecentUpdates:
+    """Recently seen update IDs, so a redelivered update is not run twice"""
+    
+    __slots__ = ("_ids", "_order")
+    
+    def __init__(self, size: int = 1024):
+        self._ids: set = set()
+        self._order: collections.deque = collections.deque(maxlen=size)
+    
+    def mark(self, update_id: int) -> bool:
+        """Record an update ID; False if it was already seen"""
+        if update_id in self._ids:
+            return False
+        if len(self._order) == self._order.maxlen:
+            self._ids.discard(self._order[0])
+        self._order.append(update_id)
+        self._ids.add(update_id)
+        return True
+
+
 class TelegramPoller:
-    """Poll Telegram for updates"""
+    """Poll Telegram for updates
+    
+    A producer long-polls getUpdates back to back into a queue while a
+    pool of consumers runs the commands, so a slow command never delays
+    the next poll. CommandHandler still runs each chat's commands in order.
+    """
     
-    def __init__(self, notifier, command_handler):
+    def __init__(self, notifier, command_handler, workers: int = 8):
         self.notifier = notifier
         self.command_handler = command_handler
         self.last_update_id = 0
-        self.session = notifier.session
+        self.session = notifier.poll_session
         self.base_url = notifier.base_url
+        # No overall cap; the read timeout just has to outlast the 10s
+        # server-side long-poll
+        self.timeout = aiohttp.ClientTimeout(total=None, sock_read=15)
+        self.workers = workers
+        self.retry_delay = 3  # Seconds to back off after a failed poll
+        
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=1024)
+        self._tasks: List[asyncio.Task] = []
+        
+        # Recently queued update IDs, so a redelivered batch is not re-run
+        self._processed = _RecentUpdates()
     
-    async def get_updates(self) -> list:
-        """Get new updates from Telegram"""
+    async def get_updates(self) -> Optional[list]:
+        """Get new updates from Telegram (None if the request failed)"""
         url = f"{self.base_url}/getUpdates"
         params = {
             "offset": self.last_update_id + 1,
@@ -524,22 +789,152 @@ class TelegramPoller:
         }
         
         try:
-            async with self.session.get(url, params=params, timeout=15) as response:
+            async with self.session.get(url, params=params, timeout=self.timeout) as response:
                 if response.status == 200:
-                    data = await response.json()
+                    if orjson:
+                        data = orjson.loads(await response.read())
+                    else:
+                        data = await response.json()
                     return data.get('result', [])
+                # 409 means a webhook is still set; neither that nor an auth
+                # error fixes itself, so don't leave it at debug level
+                error = await response.text()
+                logger.warning(f"Polling error: HTTP {response.status} - {error}")
         except Exception as e:
             logger.debug(f"Polling error: {e}")
         
-        return []
+        return None
     
-    async def process_updates(self) -> None:
-        """Process all pending updates"""
-        updates = await self.get_updates()
-        
-        for update in updates:
-            update_id = update.get('update_id', 0)
-            if update_id > self.last_update_id:
-                self.last_update_id = update_id
+    async def delete_webhook(self) -> None:
+        """Remove any webhook left by an earlier run (getUpdates fails with 409 while one is set)"""
+        url = f"{self.base_url}/deleteWebhook"
+        try:
+            async with self.notifier.session.post(url) as response:
+                if response.status != 200:
+                    error = await response.text()
+                    logger.warning(f"deleteWebhook failed: {response.status} - {error}")
+        except Exception as e:
+            logger.warning(f"deleteWebhook failed: {e}")
+    
+    async def start(self) -> None:
+        """Start the poll loop and the command workers"""
+        await self.delete_webhook()
+        self._tasks = [asyncio.create_task(self._produce())]
+        self._tasks.extend(asyncio.create_task(self._consume()) for _ in range(self.workers))
+        logger.info(f"Telegram polling started ({self.workers} workers)")
+    
+    async def stop(self) -> None:
+        """Cancel the poll loop and workers"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+    
+    async def _produce(self) -> None:
+        """Long-poll back to back, queueing each new update
+        
+        Advancing the offset before the commands run means the next poll
+        confirms the batch, so a failing handler can't get it redelivered.
+        """
+        while True:
+            updates = await self.get_updates()
+            if updates is None:
+                await asyncio.sleep(self.retry_delay)
+                continue
+            if not updates:
+                continue
             
-            await self.command_handler.handle_update(update)
+            self.last_update_id = max(
+                self.last_update_id,
+                max(u.get('update_id', 0) for u in updates)
+            )
+            for update in updates:
+                if self._processed.mark(update.get('update_id', 0)):
+                    await self._queue.put(update)
+    
+    async def _consume(self) -> None:
+        """Run queued updates through the command handler"""
+        while True:
+            update = await self._queue.get()
+            try:
+                await self.command_handler.handle_update(update)
+            except Exception:
+                logger.exception(f"Error handling update {update.get('update_id')}")
+            finally:
+                self._queue.task_done()
+
+
+class TelegramWebhook:
+    """Receive updates through a Telegram webhook
+    
+    Each update is acknowledged immediately and handled in a background
+    task, so slow commands never hold up Telegram's delivery.
+    """
+    
+    def __init__(self, notifier, command_handler, config):
+        self.notifier = notifier
+        self.command_handler = command_handler
+        self.config = config
+        self.path = f"/webhook/{config.webhook_secret}"
+        self._runner: Optional[web.AppRunner] = None
+        self._tasks: set = set()
+        self._processed = _RecentUpdates()
+    
+    async def start(self) -> None:
+        """Start the HTTP listener and register the webhook with Telegram"""
+        app = web.Application()
+        app.router.add_post(self.path, self._handle)
+        
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "0.0.0.0", self.config.webhook_port)
+        await site.start()
+        logger.info(f"Webhook listening on port {self.config.webhook_port}")
+        
+        url = f"{self.notifier.base_url}/setWebhook"
+        payload = {
+            "url": self.config.webhook_url.rstrip('/') + self.path,
+            "secret_token": self.config.webhook_secret,
+            "allowed_updates": ["message"]
+        }
+        async with self.notifier.session.post(url, json=payload) as response:
+            if response.status != 200:
+                error = await response.text()
+                raise RuntimeError(f"setWebhook failed: {response.status} - {error}")
+        logger.info("Telegram webhook registered")
+    
+    async def stop(self) -> None:
+        """Stop the HTTP listener and cancel updates still being handled"""
+        if self._runner:
+            await self._runner.cleanup()
+        
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+    
+    async def _handle(self, request: web.Request) -> web.Response:
+        """Ack the update and dispatch it in the background"""
+        token = request.headers.get("X-Telegram-Bot-Api-Secret-Token")
+        if token != self.config.webhook_secret:
+            return web.Response(status=403)
+        
+        try:
+            update = await request.json()
+        except Exception:
+            return web.Response(status=400)
+        
+        # Telegram redelivers updates it didn't see acknowledged in time
+        if not self._processed.mark(update.get('update_id', 0)):
+            return web.Response(status=200)
+        
+        task = asyncio.create_task(self.command_handler.handle_update(update))
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return web.Response(status=200)
+    
+    def _task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"Error handling update: {task.exception()}")
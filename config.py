@@ -6,8 +6,12 @@ Supports dynamic multi-movie, multi-theatre configuration
 import os
 import json
 import re
-from typing import List, Dict, Optional
+import threading
+from contextlib import contextmanager
+from collections.abc import MutableMapping
+from typing import List, Dict, Iterator, Optional
 from dataclasses import dataclass, field, asdict
+from functools import lru_cache
 from datetime import datetime
 from pathlib import Path
 
@@ -17,8 +21,29 @@ try:
 except ImportError:
     pass
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-@dataclass
+# Parsed movies files keyed by path: path -> (st_mtime_ns, data)
+_MOVIES_CACHE: Dict[str, tuple] = {}
+_MOVIES_CACHE_LOCK = threading.Lock()
+
+_SLUG_RE = re.compile(r'[^a-z0-9_]')
+
+
+@lru_cache(maxsize=512)
+def _parse_theater(theater_str: str) -> tuple:
+    """Parse NAME:PRIORITY:keyword1,keyword2 into (name, priority, keywords)"""
+    parts = theater_str.split(":")
+    name = parts[0].strip()
+    priority = int(parts[1]) if len(parts) > 1 else 1
+    keywords = tuple(k.strip().lower() for k in parts[2].split(",")) if len(parts) > 2 else (name.lower(),)
+    return name, priority, keywords
+
+
+@dataclass(slots=True)
 class TheaterConfig:
     """Theater configuration with priority"""
     name: str
@@ -39,14 +64,12 @@ class TheaterConfig:
     @classmethod
     def parse_string(cls, theater_str: str) -> 'TheaterConfig':
         """Parse theater from string format: NAME:PRIORITY:keyword1,keyword2"""
-        parts = theater_str.split(":")
-        name = parts[0].strip()
-        priority = int(parts[1]) if len(parts) > 1 else 1
-        keywords = [k.strip().lower() for k in parts[2].split(",")] if len(parts) > 2 else [name.lower()]
-        return cls(name=name, priority=priority, keywords=keywords)
+        name, priority, keywords = _parse_theater(theater_str)
+        # Cached result is shared, so hand out a fresh keyword list
+        return cls(name=name, priority=priority, keywords=list(keywords))
 
 
-@dataclass
+@dataclass(slots=True)
 class MovieConfig:
     """Individual movie configuration"""
     movie_id: str
@@ -59,16 +82,9 @@ class MovieConfig:
     added_at: str = ""
     
     def to_dict(self) -> dict:
-        return {
-            "movie_id": self.movie_id,
-            "movie_url": self.movie_url,
-            "movie_name": self.movie_name,
-            "city": self.city,
-            "target_theaters": [t.to_dict() for t in self.target_theaters],
-            "check_interval": self.check_interval,
-            "enabled": self.enabled,
-            "added_at": self.added_at
-        }
+        data = {name: getattr(self, name) for name in _MOVIE_FIELDS}
+        data["target_theaters"] = [t.to_dict() for t in self.target_theaters]
+        return data
     
     @classmethod
     def from_dict(cls, data: dict) -> 'MovieConfig':
@@ -85,6 +101,78 @@ class MovieConfig:
         )
 
 
+# Slot names in declaration order, i.e. the movies.json keys
+_MOVIE_FIELDS = MovieConfig.__slots__
+
+
+class LazyMovies(MutableMapping):
+    """movie_id -> MovieConfig, built from the raw JSON only when first accessed
+    
+    Membership, length, iteration and the summary/serialization helpers
+    work straight from the raw dicts without constructing MovieConfigs.
+    """
+    
+    __slots__ = ("_raw", "_loaded")
+    
+    def __init__(self, raw: Optional[Dict[str, dict]] = None):
+        self._raw: Dict[str, Optional[dict]] = dict(raw or {})
+        self._loaded: Dict[str, MovieConfig] = {}
+    
+    def __getitem__(self, movie_id: str) -> MovieConfig:
+        movie = self._loaded.get(movie_id)
+        if movie is None:
+            movie = self._loaded[movie_id] = MovieConfig.from_dict(self._raw[movie_id])
+        return movie
+    
+    def __setitem__(self, movie_id: str, movie: MovieConfig) -> None:
+        self._loaded[movie_id] = movie
+        self._raw.setdefault(movie_id, None)  # Keeps insertion order
+    
+    def __delitem__(self, movie_id: str) -> None:
+        del self._raw[movie_id]
+        self._loaded.pop(movie_id, None)
+    
+    def __contains__(self, movie_id) -> bool:
+        return movie_id in self._raw
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._raw)
+    
+    def __len__(self) -> int:
+        return len(self._raw)
+    
+    def to_dict(self, movie_id: str) -> dict:
+        """Serializable form of a movie, without building it if untouched"""
+        movie = self._loaded.get(movie_id)
+        return movie.to_dict() if movie is not None else self._raw[movie_id]
+    
+    def summary(self, movie_id: str) -> dict:
+        """Listing fields for a movie, without building it if untouched"""
+        movie = self._loaded.get(movie_id)
+        if movie is not None:
+            return {
+                "id": movie_id,
+                "name": movie.movie_name,
+                "city": movie.city,
+                "enabled": movie.enabled,
+                "theaters": len(movie.target_theaters)
+            }
+        raw = self._raw[movie_id]
+        return {
+            "id": movie_id,
+            "name": raw["movie_name"],
+            "city": raw.get("city", "Chennai"),
+            "enabled": raw.get("enabled", True),
+            "theaters": len(raw.get("target_theaters", []))
+        }
+    
+    def is_enabled(self, movie_id: str) -> bool:
+        movie = self._loaded.get(movie_id)
+        if movie is not None:
+            return movie.enabled
+        return self._raw[movie_id].get("enabled", True)
+
+
 @dataclass
 class AppConfig:
     """Main application configuration"""
@@ -93,17 +181,23 @@ class AppConfig:
     default_theaters: List[TheaterConfig] = field(default_factory=list)
     
     # Active movies
-    movies: Dict[str, MovieConfig] = field(default_factory=dict)
+    movies: LazyMovies = field(default_factory=LazyMovies)
     
     # Timing
     check_interval: int = 120
     min_interval: int = 30
     max_interval: int = 300
+    max_concurrent_checks: int = 4  # Movies checked at once
     
     # Telegram
     telegram_token: str = ""
     telegram_chat_id: str = ""
     
+    # Webhook (empty URL = long-polling)
+    webhook_url: str = ""
+    webhook_secret: str = ""
+    webhook_port: int = 8443
+    
     # Browser
     headless: bool = True
     user_agent: str = (
@@ -112,6 +206,10 @@ class AppConfig:
         "Chrome/120.0.0.0 Safari/537.36"
     )
     request_timeout: int = 60000
+    max_pages: int = 2
+    page_recycle_threshold: int = 50  # Close a pooled page after N fetches
+    context_recycle_threshold: int = 200  # Reopen browser context after N fetches
+    browser_profile_dir: str = ""  # Persistent Chromium profile (empty = ephemeral)
     
     # Reliability
     max_retries: int = 3
@@ -129,6 +227,15 @@ class AppConfig:
     # Registered users (chat IDs that receive alerts)
     registered_users: set = field(default_factory=set)
     
+    # Bumped on every movie mutation; invalidates derived caches
+    _movies_version: int = field(default=0, init=False, repr=False)
+    _active_movies: tuple = field(default=(), init=False, repr=False)
+    _active_version: int = field(default=-1, init=False, repr=False)
+    
+    # Inside batch(), save_movies only marks the file dirty
+    _movies_dirty: bool = field(default=False, init=False, repr=False)
+    _batch_depth: int = field(default=0, init=False, repr=False)
+    
     @classmethod
     def from_env(cls) -> 'AppConfig':
         """Load configuration from environment"""
@@ -156,12 +263,20 @@ class AppConfig:
             check_interval=int(os.getenv("CHECK_INTERVAL", "120")),
             min_interval=int(os.getenv("MIN_INTERVAL", "30")),
             max_interval=int(os.getenv("MAX_INTERVAL", "300")),
+            max_concurrent_checks=int(os.getenv("MAX_CONCURRENT_CHECKS", "4")),
             telegram_token=telegram_token,
             telegram_chat_id=telegram_chat_id,
+            webhook_url=os.getenv("WEBHOOK_URL", ""),
+            webhook_secret=os.getenv("WEBHOOK_SECRET", ""),
+            webhook_port=int(os.getenv("WEBHOOK_PORT", "8443")),
             headless=os.getenv("HEADLESS", "true").lower() == "true",
             max_retries=int(os.getenv("MAX_RETRIES", "3")),
             retry_delay=int(os.getenv("RETRY_DELAY", "5")),
             request_timeout=int(os.getenv("REQUEST_TIMEOUT", "60000")),
+            max_pages=int(os.getenv("MAX_PAGES", "2")),
+            page_recycle_threshold=int(os.getenv("PAGE_RECYCLE_THRESHOLD", "50")),
+            context_recycle_threshold=int(os.getenv("CONTEXT_RECYCLE_THRESHOLD", "200")),
+            browser_profile_dir=os.getenv("BROWSER_PROFILE_DIR", ""),
             circuit_breaker_threshold=int(os.getenv("CIRCUIT_BREAKER_THRESHOLD", "5")),
             circuit_breaker_timeout=int(os.getenv("CIRCUIT_BREAKER_TIMEOUT", "300")),
             log_level=os.getenv("LOG_LEVEL", "INFO"),
@@ -195,22 +310,75 @@ class AppConfig:
             return
         
         try:
-            with open(self.movies_file, 'r') as f:
-                data = json.load(f)
-                self.movies = {
-                    movie_id: MovieConfig.from_dict(movie_data)
-                    for movie_id, movie_data in data.items()
-                }
+            with _MOVIES_CACHE_LOCK:
+                mtime = os.stat(self.movies_file).st_mtime_ns
+                cached = _MOVIES_CACHE.get(self.movies_file)
+                if cached and cached[0] == mtime:
+                    data = cached[1]
+                else:
+                    with open(self.movies_file, 'rb') as f:
+                        raw = f.read()
+                    data = orjson.loads(raw) if orjson else json.loads(raw)
+                    _MOVIES_CACHE[self.movies_file] = (mtime, data)
+            
+            self.movies = LazyMovies(data)
+            self._movies_version += 1
         except Exception as e:
             print(f"Warning: Could not load movies config: {e}")
     
+    @contextmanager
+    def batch(self):
+        """Group movie edits into a single write of the movies file
+        
+            with config.batch():
+                for url, name in pending:
+                    config.add_movie(url, name)
+        
+        The file is only written when the outermost block exits normally;
+        edits from a block that raised stay pending for the next save.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            raise
+        self._batch_depth -= 1
+        if self._batch_depth == 0 and self._movies_dirty:
+            self._write_movies()
+    
+    @property
+    def movies_version(self) -> int:
+        """Changes whenever movies are loaded or modified"""
+        return self._movies_version
+    
     def save_movies(self) -> None:
-        """Save movies to JSON file"""
+        """Save movies to JSON file (deferred until the end of a batch)"""
+        self._movies_version += 1
+        self._movies_dirty = True
+        if self._batch_depth == 0:
+            self._write_movies()
+    
+    def _write_movies(self) -> None:
+        """Write movies to JSON file (left dirty if the write fails, so the next save retries)"""
         try:
             Path(self.movies_file).parent.mkdir(parents=True, exist_ok=True)
-            with open(self.movies_file, 'w') as f:
-                data = {mid: m.to_dict() for mid, m in self.movies.items()}
-                json.dump(data, f, indent=2)
+            data = {mid: self.movies.to_dict(mid) for mid in self.movies}
+            if orjson:
+                payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+            else:
+                payload = json.dumps(data, indent=2).encode()
+            
+            with _MOVIES_CACHE_LOCK:
+                # Write a sibling temp file in one go, then swap it in, so
+                # readers never see a half-written file
+                tmp_path = self.movies_file + ".tmp"
+                with open(tmp_path, 'wb', buffering=1 << 20) as f:
+                    f.write(payload)
+                os.replace(tmp_path, self.movies_file)
+                self._movies_dirty = False
+                # What we just wrote is already parsed; no need to re-read it
+                _MOVIES_CACHE[self.movies_file] = (os.stat(self.movies_file).st_mtime_ns, data)
         except Exception as e:
             print(f"Warning: Could not save movies config: {e}")
     
@@ -268,7 +436,7 @@ class AppConfig:
     def _generate_movie_id(self, name: str, city: str) -> str:
         """Generate unique movie ID"""
         base = f"{name.lower().replace(' ', '_')}_{city.lower()}"
-        base = re.sub(r'[^a-z0-9_]', '', base)
+        base = _SLUG_RE.sub('', base)
         
         # Ensure uniqueness
         if base not in self.movies:
@@ -339,20 +507,15 @@ class AppConfig:
     
     def get_active_movies(self) -> List[MovieConfig]:
         """Get all enabled movies"""
-        return [m for m in self.movies.values() if m.enabled]
+        if self._active_version != self._movies_version:
+            movies = self.movies
+            self._active_movies = tuple(movies[mid] for mid in movies if movies.is_enabled(mid))
+            self._active_version = self._movies_version
+        return list(self._active_movies)
     
     def list_movies(self) -> List[Dict]:
         """Get summary of all movies"""
-        return [
-            {
-                "id": mid,
-                "name": m.movie_name,
-                "city": m.city,
-                "enabled": m.enabled,
-                "theaters": len(m.target_theaters)
-            }
-            for mid, m in self.movies.items()
-        ]
+        return [self.movies.summary(mid) for mid in self.movies]
     
     def update_movie_theaters(self, movie_id: str, theaters: List[TheaterConfig]) -> bool:
         """Update theaters for a specific movie"""
@@ -394,3 +557,9 @@ class AppConfig:
             raise ValueError(f"check_interval must be <= {self.max_interval}")
         if self.max_retries < 1:
             raise ValueError("max_retries must be >= 1")
+        if self.max_pages < 1:
+            raise ValueError("max_pages must be >= 1")
+        if self.max_concurrent_checks < 1:
+            raise ValueError("max_concurrent_checks must be >= 1")
+        if self.webhook_url and not re.fullmatch(r'[A-Za-z0-9_-]{1,256}', self.webhook_secret):
+            raise ValueError("WEBHOOK_SECRET (letters, digits, _ or -) is required with WEBHOOK_URL")
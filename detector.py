@@ -5,11 +5,55 @@ Change detection using content hashing
 import hashlib
 import json
 import logging
-from typing import List, Set
+from operator import attrgetter
+from typing import List, Optional, Set, Tuple
 from datetime import datetime
 
+from extractor import format_available_times
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# Hashes only detect changes, so a fast non-cryptographic 128-bit hash will do
+try:
+    import xxhash
+    _new_hash = xxhash.xxh3_128
+except ImportError:
+    def _new_hash(data: bytes = b""):
+        return hashlib.blake2b(data, digest_size=16)
+
 logger = logging.getLogger(__name__)
 
+# Separates theater names in the stored name list (ASCII unit separator)
+_NAME_SEP = "\x1f"
+
+# Showtimes are hashed in time order, as listed; ties keep their order
+_by_time = attrgetter("time")
+
+
+def content_digest(*parts: Optional[str]) -> bytes:
+    """Digest of a fetched page's text parts (None allowed), to spot unchanged pages"""
+    h = _new_hash()
+    for part in parts:
+        h.update(part.encode() if part else b"")
+        h.update(b"\x00")
+    return h.digest()
+
+
+def _decode_names(payload: Optional[str]) -> Set[str]:
+    """Theater names from a stored payload (also reads the old JSON lists)"""
+    if not payload:
+        return set()
+    if payload.startswith("["):
+        try:
+            return set(_loads(payload))
+        except ValueError:
+            return set()
+    return set(payload.split(_NAME_SEP))
+
 
 class ChangeDetector:
     """Detect changes in theater availability"""
@@ -20,23 +64,25 @@ class ChangeDetector:
         self._hash_key = f"hash_{movie_id}"
         self._theaters_key = f"theaters_{movie_id}"
     
+    @staticmethod
+    def _theater_digest(theater) -> bytes:
+        """Digest of one theater's name and showtimes (in time order)"""
+        # Build the canonical bytes in one buffer and hash them in one call
+        buf = bytearray(theater.name.encode())
+        for st in sorted(theater.showtimes, key=_by_time):
+            buf += f"\x00{st.time}\x1f".encode()
+            buf += b"1" if st.available else b"0"
+            buf += f"\x1f{st.format}".encode()
+        return _new_hash(buf).digest()
+    
     def compute_hash(self, theaters: List) -> str:
-        """Compute hash of theater data"""
-        sorted_theaters = sorted(theaters, key=lambda t: (t.priority, t.name))
+        """Compute hash of theater data
         
-        data = []
-        for theater in sorted_theaters:
-            theater_data = {
-                "name": theater.name,
-                "showtimes": [
-                    {"time": st.time, "available": st.available, "format": st.format}
-                    for st in sorted(theater.showtimes, key=lambda x: x.time)
-                ]
-            }
-            data.append(theater_data)
-        
-        json_str = json.dumps(data, sort_keys=True)
-        return hashlib.sha256(json_str.encode()).hexdigest()
+        Each theater is hashed on its own and the digests are combined in
+        sorted order, so the result doesn't depend on theater order.
+        """
+        digests = sorted(self._theater_digest(theater) for theater in theaters)
+        return _new_hash(b"".join(digests)).hexdigest()
     
     def is_new_availability(self, theaters: List) -> bool:
         """Check if this is new availability"""
@@ -59,23 +105,17 @@ class ChangeDetector:
         """Get newly appearing theaters"""
         current_names = {t.name for t in theaters}
         
-        last_names_str = self.state.get_value(self._theaters_key, "[]")
-        try:
-            last_names = set(json.loads(last_names_str))
-        except:
-            last_names = set()
-        
+        last_names = _decode_names(self.state.get_value(self._theaters_key, ""))
         new_names = current_names - last_names
         
+        # Only encode and write when membership actually changed
+        if current_names != last_names:
+            self.state.set_value(self._theaters_key, _NAME_SEP.join(sorted(current_names)))
+        
         if new_names:
             logger.info(f"New theaters: {new_names}")
-            self.state.set_value(self._theaters_key, json.dumps(list(current_names)))
             return [t for t in theaters if t.name in new_names]
         
-        # Update theater list
-        if current_names != last_names:
-            self.state.set_value(self._theaters_key, json.dumps(list(current_names)))
-        
         return []
     
     def should_alert(self, theaters: List, force: bool = False) -> bool:
@@ -86,31 +126,41 @@ class ChangeDetector:
         if not theaters:
             return False
         
-        is_new = self.is_new_availability(theaters)
-        new_theaters = self.get_new_theaters(theaters)
-        
-        return is_new or len(new_theaters) > 0
+        # Hash, change time and name list land in one commit
+        with self.state.batch():
+            is_new, new_theaters = self._diff(theaters)
+        return is_new or bool(new_theaters)
+    
+    def _diff(self, theaters: List) -> Tuple[bool, List]:
+        """(availability changed, newly appearing theaters) in one pass
+        
+        Theater names are part of the hash and both are stored together,
+        so an unchanged hash means no new theaters and the name list
+        needn't be read at all.
+        """
+        if not self.is_new_availability(theaters):
+            return False, []
+        return True, self.get_new_theaters(theaters)
     
     def format_summary(self, theaters: List) -> str:
-        """Create human-readable summary"""
+        """Create human-readable summary
+        
+        Expects theaters in the order DataExtractor.process_page_data
+        returns them (priority, then name).
+        """
         if not theaters:
             return "No theaters available"
         
-        sorted_theaters = sorted(theaters, key=lambda t: (t.priority, t.name))
-        
         lines = []
-        for theater in sorted_theaters:
+        for theater in theaters:
             stars = "⭐" * theater.priority
             lines.append(f"{stars} *{theater.name}*")
             
             if theater.location:
                 lines.append(f"   📍 {theater.location}")
             
-            available = [st.time for st in theater.showtimes if st.available]
-            if available:
-                times = ", ".join(available[:6])
-                if len(available) > 6:
-                    times += f" +{len(available) - 6} more"
+            times = format_available_times(theater.showtimes)
+            if times:
                 lines.append(f"   🎬 {times}")
             
             lines.append("")
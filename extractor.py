@@ -2,17 +2,186 @@
 Data extraction from District.in pages
 """
 
+import html as html_lib
 import json
 import re
+import sys
 import logging
-from typing import Dict, List, Optional
-from dataclasses import dataclass
-from bs4 import BeautifulSoup
+from typing import Dict, List, Optional, Union
+from dataclasses import dataclass, field
+from operator import attrgetter
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import orjson
+    _loads = orjson.loads  # orjson.JSONDecodeError subclasses json.JSONDecodeError
+except ImportError:
+    _loads = json.loads
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 logger = logging.getLogger(__name__)
 
+# Class-name patterns of District.in's showtime listing markup
+_SESSIONS_RE = re.compile(r'MovieSessionsListing_movieSessions')
+_TIMEBLOCK_RE = re.compile(r'MovieSessionsListing_timeblock')
+_TIME_COL_RE = re.compile(r'.*Col.*MovieSessionsListing_time')
+_TIME_DIV_RE = re.compile(r'MovieSessionsListing_time')
+_FORMAT_RE = re.compile(r'MovieSessionsListing_timeblock__frmt')
+
+# Only the theater listings are built into a tree; the rest of the page is skipped
+_SESSIONS_ONLY = SoupStrainer('li', class_=_SESSIONS_RE)
+
+# Order theaters are reported in: highest priority (lowest number) first, then name
+THEATER_ORDER = attrgetter("priority", "name")
+
+# Candidate locations of venue data under __NEXT_DATA__ props.pageProps
+VENUE_PATHS = (
+    ("initialState", "movie", "venues"),
+    ("movie", "venues"),
+    ("venues",),
+    ("initialState", "shows"),
+    ("shows",),
+    ("initialData", "venues"),
+    ("data", "venues"),
+)
+
+# Venue names recur every poll; their keyword matches are memoized up to this many
+_MATCH_CACHE_SIZE = 2048
+
+# Opening tag of the Next.js data script in a page's HTML
+_NEXT_DATA_RE = re.compile(r'<script[^>]*\bid="__NEXT_DATA__"[^>]*>')
+
+# Every VENUE_PATHS candidate ends in one of these keys; pages without
+# them (e.g. before bookings open) aren't worth fully parsing
+_VENUE_KEYS = ('"venues"', '"shows"')
+_VENUE_KEYS_BYTES = tuple(key.encode() for key in _VENUE_KEYS)
+
+# Showtime in a time block's text, e.g. "09:30 AM"
+_TIME_RE = re.compile(r'(\d{1,2}:\d{2}\s*(?:AM|PM))', re.IGNORECASE)
+
+
+def _soup_listings(html: str):
+    """(theater link text, listing element) per theater listing, via BeautifulSoup"""
+    elements = BeautifulSoup(html, 'lxml', parse_only=_SESSIONS_ONLY).find_all('li', class_=_SESSIONS_RE)
+    logger.debug("Found %d theater elements in HTML", len(elements))
+    
+    for element in elements:
+        # Theater detail links typically have this pattern; only those are
+        # worth flattening to text
+        for link in element.find_all('a', href=True):
+            href = link['href']
+            if '/movies/' in href and '-in-' in href:
+                text = link.get_text(strip=True)
+                if text:
+                    yield text, element
+                    break
+
+
+def _soup_timeblocks(element):
+    """(time text, time div classes, format text) per time block, via BeautifulSoup"""
+    for block in element.find_all('li', class_=_TIMEBLOCK_RE):
+        # Prefer the time div carrying the availability color class
+        time_div = block.find('div', class_=_TIME_COL_RE) or block.find('div', class_=_TIME_DIV_RE)
+        if not time_div:
+            continue
+        
+        div_classes = time_div.get('class', [])
+        class_str = ' '.join(div_classes) if isinstance(div_classes, list) else str(div_classes)
+        format_span = time_div.find('span', class_=_FORMAT_RE)
+        yield (
+            time_div.get_text(separator=' ', strip=True),
+            class_str,
+            format_span.get_text(strip=True) if format_span else ""
+        )
+
 
-@dataclass
+def _lexbor_listings(html: str):
+    """(theater link text, listing element) per theater listing, via selectolax"""
+    elements = LexborHTMLParser(html).css('li[class*="MovieSessionsListing_movieSessions"]')
+    logger.debug("Found %d theater elements in HTML", len(elements))
+    
+    for element in elements:
+        for link in element.css('a[href*="/movies/"][href*="-in-"]'):
+            text = link.text(strip=True)
+            if text:
+                yield text, element
+                break
+
+
+def _lexbor_timeblocks(element):
+    """(time text, time div classes, format text) per time block, via selectolax"""
+    for block in element.css('li[class*="MovieSessionsListing_timeblock"]'):
+        time_divs = block.css('div[class*="MovieSessionsListing_time"]')
+        if not time_divs:
+            continue
+        
+        # Prefer the time div carrying the availability color class
+        time_div = next(
+            (div for div in time_divs if _TIME_COL_RE.search(div.attributes.get('class') or '')),
+            time_divs[0]
+        )
+        format_span = time_div.css_first('span[class*="MovieSessionsListing_timeblock__frmt"]')
+        yield (
+            time_div.text(separator=' ', strip=True),
+            time_div.attributes.get('class') or '',
+            format_span.text(strip=True) if format_span else ""
+        )
+
+
+# selectolax's C parser when installed, BeautifulSoup + lxml otherwise
+if LexborHTMLParser is not None:
+    _html_listings, _html_timeblocks = _lexbor_listings, _lexbor_timeblocks
+else:
+    _html_listings, _html_timeblocks = _soup_listings, _soup_timeblocks
+
+
+def format_available_times(showtimes, limit: int = 6) -> str:
+    """First `limit` available times plus a "+N more" count, in one pass"""
+    times = []
+    extra = 0
+    for st in showtimes:
+        if not st.available:
+            continue
+        if len(times) < limit:
+            times.append(st.time)
+        else:
+            extra += 1
+    time_str = ", ".join(times)
+    if extra:
+        time_str += f" +{extra} more"
+    return time_str
+
+
+def _next_data_from_html(html: str) -> Optional[str]:
+    """Text of the __NEXT_DATA__ script in raw HTML, located without parsing it"""
+    match = _NEXT_DATA_RE.search(html)
+    if not match:
+        return None
+    end = html.find('</script>', match.end())
+    return html[match.end():end] if end != -1 else None
+
+
+def _walk(data, path: tuple):
+    """Follow keys through nested dicts; None at the first missing/empty step"""
+    for key in path:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+        if not data:
+            return None
+    return data
+
+
+@dataclass(slots=True)
 class ShowTime:
     """Showtime information"""
     time: str
@@ -20,17 +189,13 @@ class ShowTime:
     format: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class Theater:
     """Theater with showtimes"""
     name: str
     location: str = ""
-    showtimes: List[ShowTime] = None
+    showtimes: List[ShowTime] = field(default_factory=list)
     priority: int = 1
-    
-    def __post_init__(self):
-        if self.showtimes is None:
-            self.showtimes = []
 
 
 class DataExtractor:
@@ -43,55 +208,126 @@ class DataExtractor:
         """
         self.target_theaters = target_theaters
         self.theater_keywords = self._build_keyword_map()
+        self._keyword_items = tuple(self.theater_keywords.items())
+        self._automaton = self._build_automaton()
+        self._linear_match = self._build_linear_matcher() if self._automaton is None else None
+        self._keyword_re = self._build_keyword_regex()
+        self._match_cache: Dict[str, Optional[Dict]] = {}
     
     def _build_keyword_map(self) -> Dict[str, Dict]:
         """Build keyword to theater mapping"""
         keyword_map = {}
         for theater in self.target_theaters:
+            # Interned so every Theater built from this config shares one name object
+            name = sys.intern(theater.name)
             for keyword in theater.keywords:
-                keyword_map[keyword.lower()] = {
-                    "name": theater.name,
+                keyword_map[sys.intern(keyword.lower())] = {
+                    "name": name,
                     "priority": theater.priority
                 }
         return keyword_map
     
+    def _build_automaton(self):
+        """Aho-Corasick automaton over all keywords (None if unavailable)"""
+        if ahocorasick is None or not self._keyword_items:
+            return None
+        
+        automaton = ahocorasick.Automaton()
+        for order, (keyword, config) in enumerate(self._keyword_items):
+            # Empty keywords match everything in the linear scan; keep that path
+            if not keyword:
+                return None
+            automaton.add_word(keyword, (order, config))
+        automaton.make_automaton()
+        return automaton
+    
+    def _build_linear_matcher(self):
+        """Keyword scan specialized to this keyword list (fallback without the automaton)
+        
+        Generates one `if <keyword> in name: return <config>` line per
+        keyword, in configured order, so matching is a straight run of
+        `in` tests with no loop or tuple unpacking.
+        """
+        lines = ["def _match(name_lower):"]
+        for order, (keyword, _) in enumerate(self._keyword_items):
+            lines.append(f"    if {keyword!r} in name_lower: return _configs[{order}]")
+        lines.append("    return None")
+        
+        namespace = {"_configs": tuple(config for _, config in self._keyword_items)}
+        exec("\n".join(lines), namespace)
+        return namespace["_match"]
+    
+    def _build_keyword_regex(self) -> Optional[re.Pattern]:
+        """Regex finding any keyword in raw HTML (None if it can't rule pages out)"""
+        variants = set()
+        for keyword, _ in self._keyword_items:
+            if not keyword:
+                return None  # An empty keyword matches every theater
+            variants.add(keyword)
+            variants.add(html_lib.escape(keyword, quote=False))
+        if not variants:
+            return None
+        return re.compile('|'.join(map(re.escape, sorted(variants))), re.IGNORECASE)
+    
     def _match_theater(self, theater_name: str) -> Optional[Dict]:
-        """Match theater name against keywords"""
-        name_lower = theater_name.lower()
+        """Match theater name against keywords
         
-        for keyword, config in self.theater_keywords.items():
-            if keyword in name_lower:
-                return config
+        Ties between several matching keywords go to the one configured
+        first, with or without the automaton.
+        """
+        try:
+            return self._match_cache[theater_name]
+        except KeyError:
+            pass
         
-        return None
+        config = self._scan_keywords(theater_name.lower())
+        if len(self._match_cache) >= _MATCH_CACHE_SIZE:
+            self._match_cache.clear()
+        self._match_cache[theater_name] = config
+        return config
+    
+    def _scan_keywords(self, name_lower: str) -> Optional[Dict]:
+        """First configured keyword found in a lowercased name"""
+        if self._automaton is not None:
+            best = None
+            for _, (order, config) in self._automaton.iter(name_lower):
+                if order == 0:
+                    return config  # Nothing can beat the first keyword
+                if best is None or order < best[0]:
+                    best = (order, config)
+            return best[1] if best else None
+        
+        return self._linear_match(name_lower)
     
-    def extract_from_json(self, json_str: str) -> List[Theater]:
-        """Extract from __NEXT_DATA__ JSON"""
+    def extract_from_json(self, json_str: Union[str, bytes]) -> List[Theater]:
+        """Extract from __NEXT_DATA__ JSON (str or raw UTF-8 bytes)"""
         theaters = []
         
+        # Local aliases: the venue/show loop below runs O(venues x shows)
+        get = dict.get
+        intern = sys.intern
+        match_theater = self._match_theater
+        append_theater = theaters.append
+        new_show = ShowTime
+        new_theater = Theater
+        
         try:
-            data = json.loads(json_str)
-            page_props = data.get("props", {}).get("pageProps", {})
+            keys = _VENUE_KEYS_BYTES if isinstance(json_str, (bytes, bytearray)) else _VENUE_KEYS
+            if not any(key in json_str for key in keys):
+                logger.debug("No venue data in JSON")
+                return theaters
+            
+            data = _loads(json_str)
+            page_props = _walk(data, ("props", "pageProps"))
             
             # Try multiple paths for venue data
             venues = None
-            for path in [
-                ["initialState", "movie", "venues"],
-                ["movie", "venues"],
-                ["venues"],
-                ["initialState", "shows"],
-                ["shows"],
-                ["initialData", "venues"],
-                ["data", "venues"]
-            ]:
-                temp = page_props
-                for key in path:
-                    temp = temp.get(key, {})
-                    if not temp:
+            if page_props is not None:
+                for path in VENUE_PATHS:
+                    temp = _walk(page_props, path)
+                    if isinstance(temp, (list, dict)):
+                        venues = temp
                         break
-                if temp and isinstance(temp, (list, dict)):
-                    venues = temp
-                    break
             
             if not venues:
                 logger.debug("No venue data in JSON")
@@ -100,45 +336,45 @@ class DataExtractor:
             venue_list = venues if isinstance(venues, list) else venues.values()
             
             for venue in venue_list:
-                theater_name = venue.get("name", "") or venue.get("venueName", "")
+                theater_name = get(venue, "name") or get(venue, "venueName") or ""
                 
                 # Check if target theater
-                theater_config = self._match_theater(theater_name)
+                theater_config = match_theater(theater_name)
                 if not theater_config:
                     continue
                 
                 # Get location
-                location = venue.get("location", {})
+                location = get(venue, "location", {})
                 location_str = ""
                 if isinstance(location, dict):
-                    location_str = location.get("address", "") or location.get("area", "")
+                    location_str = get(location, "address") or get(location, "area") or ""
                 elif isinstance(location, str):
                     location_str = location
                 
                 # Extract showtimes
-                shows = venue.get("shows", []) or venue.get("showtimes", [])
+                shows = get(venue, "shows") or get(venue, "showtimes") or ()
                 showtimes = []
+                append_show = showtimes.append
                 
                 for show in shows:
-                    time = show.get("time", "") or show.get("showTime", "") or show.get("startTime", "")
-                    available = show.get("available", False) or show.get("isAvailable", False) or show.get("bookingAllowed", False)
-                    format_type = show.get("format", "") or show.get("experienceType", "") or show.get("screen", "")
+                    time = get(show, "time") or get(show, "showTime") or get(show, "startTime")
+                    available = get(show, "available") or get(show, "isAvailable") or get(show, "bookingAllowed") or False
+                    format_type = get(show, "format") or get(show, "experienceType") or get(show, "screen") or ""
+                    if isinstance(format_type, str):
+                        format_type = intern(format_type)
                     
                     if time:
-                        showtimes.append(ShowTime(
-                            time=time,
-                            available=available,
-                            format=format_type
-                        ))
+                        # Positional: half the cost of keyword arguments per show
+                        append_show(new_show(time, available, format_type))
                 
                 if showtimes:
-                    theaters.append(Theater(
+                    append_theater(new_theater(
                         name=theater_config["name"],
                         location=location_str,
                         showtimes=showtimes,
                         priority=theater_config["priority"]
                     ))
-                    logger.debug(f"Found {len(showtimes)} shows at {theater_config['name']}")
+                    logger.debug("Found %d shows at %s", len(showtimes), theater_config["name"])
         
         except json.JSONDecodeError as e:
             logger.error(f"JSON parse error: {e}")
@@ -152,55 +388,26 @@ class DataExtractor:
         theaters = []
         
         try:
-            soup = BeautifulSoup(html, 'lxml')
-            
-            # Find all theater listing elements
-            theater_elements = soup.find_all('li', class_=re.compile(r'MovieSessionsListing_movieSessions'))
-            
-            logger.debug(f"Found {len(theater_elements)} theater elements in HTML")
+            # No target keyword anywhere in the page: nothing can match
+            if not self._keyword_items or (self._keyword_re and not self._keyword_re.search(html)):
+                logger.debug("No target theater keywords in HTML")
+                return theaters
             
-            for element in theater_elements:
-                # Get theater name - look for link with theater href pattern
-                theater_name = ""
-                
-                # Find all links and get the one with theater name
-                for link in element.find_all('a'):
-                    href = link.get('href', '')
-                    text = link.get_text(strip=True)
-                    
-                    # Theater detail links typically have this pattern
-                    if '/movies/' in href and '-in-' in href and text:
-                        theater_name = text
-                        break
-                
-                if not theater_name:
-                    continue
-                
+            for theater_name, element in _html_listings(html):
                 # Check if this matches our target theaters
                 theater_config = self._match_theater(theater_name)
                 if not theater_config:
                     continue
                 
-                logger.info(f"Found matching theater: {theater_name}")
+                logger.info("Found matching theater: %s", theater_name)
                 
                 # Get showtimes from timeblock elements
                 showtimes = []
-                timeblocks = element.find_all('li', class_=re.compile(r'MovieSessionsListing_timeblock'))
+                available_count = 0
                 
-                for block in timeblocks:
-                    # Get time div with color indicator
-                    time_div = block.find('div', class_=re.compile(r'.*Col.*MovieSessionsListing_time'))
-                    if not time_div:
-                        time_div = block.find('div', class_=re.compile(r'MovieSessionsListing_time'))
-                    
-                    if not time_div:
-                        continue
-                    
-                    # Get time text (first text node)
-                    time_text = time_div.get_text(separator=' ', strip=True)
-                    
+                for time_text, class_str, format_text in _html_timeblocks(element):
                     # Parse time - typically first part before any format info
-                    time_match = re.search(r'(\d{1,2}:\d{2}\s*(?:AM|PM))', time_text, re.IGNORECASE)
+                    time_match = _TIME_RE.search(time_text)
                     if not time_match:
                         continue
                     
@@ -209,24 +416,17 @@ class DataExtractor:
                     # Determine availability by color class
                     # greenCol = Available, yellowCol = Filling fast, redCol = Almost full (all available)
                     # greyCol = Sold out (not available)
-                    div_classes = time_div.get('class', [])
-                    class_str = ' '.join(div_classes) if isinstance(div_classes, list) else str(div_classes)
-                    
                     is_available = 'greyCol' not in class_str
-                    
-                    # Get format (screen name) if any
-                    format_span = time_div.find('span', class_=re.compile(r'MovieSessionsListing_timeblock__frmt'))
-                    format_type = format_span.get_text(strip=True) if format_span else ""
+                    available_count += is_available
                     
                     showtimes.append(ShowTime(
                         time=show_time,
                         available=is_available,
-                        format=format_type
+                        format=sys.intern(format_text)
                     ))
                 
                 if showtimes:
-                    available_count = sum(1 for st in showtimes if st.available)
-                    logger.info(f"{theater_config['name']}: {available_count}/{len(showtimes)} shows available")
+                    logger.info("%s: %d/%d shows available", theater_config["name"], available_count, len(showtimes))
                     
                     theaters.append(Theater(
                         name=theater_config["name"],
@@ -241,10 +441,15 @@ class DataExtractor:
         return theaters
     
     def process_page_data(self, page_result: Dict) -> Dict:
-        """Main processing function"""
+        """Main processing function
+        
+        Theaters come back sorted by THEATER_ORDER, so consumers needn't
+        re-sort them.
+        """
         result = {
             "success": False,
             "theaters": [],
+            "source": None,  # "json" or "html"
             "error": None
         }
         
@@ -252,12 +457,18 @@ class DataExtractor:
             result["error"] = page_result.get("error", "Page fetch failed")
             return result
         
-        # Try JSON first
-        if page_result.get("content"):
-            theaters = self.extract_from_json(page_result["content"])
+        # Try JSON first, taken from the HTML when the caller only has that
+        content = page_result.get("content")
+        if not content and page_result.get("html"):
+            content = _next_data_from_html(page_result["html"])
+        
+        if content:
+            theaters = self.extract_from_json(content)
             if theaters:
+                theaters.sort(key=THEATER_ORDER)
                 result["success"] = True
                 result["theaters"] = theaters
+                result["source"] = "json"
                 return result
         
         # Fallback to HTML
@@ -265,8 +476,10 @@ class DataExtractor:
             logger.debug("Falling back to HTML parsing")
             theaters = self.extract_from_html(page_result["html"])
             if theaters:
+                theaters.sort(key=THEATER_ORDER)
                 result["success"] = True
                 result["theaters"] = theaters
+                result["source"] = "html"
                 return result
         
         result["error"] = "No theater data found"
@@ -9,15 +9,15 @@ import signal
 import sys
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
 
 from config import AppConfig, MovieConfig
 from browser import BrowserController, CircuitBreaker
 from extractor import DataExtractor
-from detector import ChangeDetector
+from detector import ChangeDetector, content_digest
 from notifier import TelegramNotifier
 from state import StateManager
-from commands import CommandHandler, TelegramPoller
+from commands import CommandHandler, TelegramPoller, TelegramWebhook
 
 
 class MovieMonitor:
@@ -30,6 +30,7 @@ class MovieMonitor:
         self.notifier = shared_components['notifier']
         self.circuit_breaker = shared_components['circuit_breaker']
         self.config = shared_components['config']
+        self.pending_alerts = shared_components['pending_alerts']
         
         # Create extractor with movie's theater config
         self.extractor = DataExtractor(movie.target_theaters)
@@ -38,6 +39,13 @@ class MovieMonitor:
         self.last_check = None
         self.check_count = 0
         self.consecutive_failures = 0
+        
+        # Only pull full HTML while __NEXT_DATA__ alone isn't enough
+        self.needs_html = True
+        
+        # Extraction result of the last page fetched, keyed by its content digest
+        self._last_digest: Optional[bytes] = None
+        self._last_extraction: Optional[Dict] = None
     
     async def check(self) -> bool:
         """Check availability for this movie"""
@@ -54,7 +62,10 @@ class MovieMonitor:
                 return False
             
             # Fetch page
-            page_result = await self.browser.fetch_page_content(self.movie.movie_url)
+            page_result = await self.browser.fetch_page_content(
+                self.movie.movie_url,
+                need_html=self.needs_html
+            )
             
             if not page_result["success"]:
                 error = page_result.get("error", "Unknown error")
@@ -62,16 +73,24 @@ class MovieMonitor:
                 
                 self.circuit_breaker.record_failure()
                 self.consecutive_failures += 1
-                self.state.record_check(False, 0, f"{self.movie.movie_id}: {error}")
+                self.state.record_check_async(False, 0, f"{self.movie.movie_id}: {error}")
                 return False
             
-            # Extract data
-            extraction_result = self.extractor.process_page_data(page_result)
+            # Extract data (unless the page is byte-identical to the last one)
+            digest = content_digest(page_result["content"], page_result["html"])
+            if digest == self._last_digest:
+                extraction_result = self._last_extraction
+                logger.debug("Page unchanged, reusing last extraction")
+            else:
+                extraction_result = self.extractor.process_page_data(page_result)
+                self._last_digest = digest
+                self._last_extraction = extraction_result
+            self.needs_html = extraction_result.get("source") != "json"
             
             if not extraction_result["success"]:
                 error = extraction_result.get("error", "No data")
                 logger.warning(f"Extraction issue: {error}")
-                self.state.record_check(True, 0, f"{self.movie.movie_id}: {error}")
+                self.state.record_check_async(True, 0, f"{self.movie.movie_id}: {error}")
                 return False
             
             theaters = extraction_result["theaters"]
@@ -80,26 +99,18 @@ class MovieMonitor:
             # Record success
             self.circuit_breaker.record_success()
             self.consecutive_failures = 0
-            self.state.record_check(True, len(theaters))
+            self.state.record_check_async(True, len(theaters))
             
             # Check for changes and alert
             if theaters:
                 should_alert = self.detector.should_alert(theaters)
                 
                 if should_alert:
-                    logger.info("New availability detected! Sending alert...")
-                    
-                    success = await self.notifier.send_booking_alert(
-                        self.movie.movie_name,
-                        theaters,
-                        self.movie.movie_url
+                    # Sent together with other movies' alerts after this round
+                    logger.info("New availability detected! Queueing alert...")
+                    self.pending_alerts.append(
+                        (self.movie.movie_name, theaters, self.movie.movie_url)
                     )
-                    
-                    if success:
-                        self.state.record_alert(theaters, f"{self.movie.movie_name} alert")
-                        logger.info("Alert sent successfully")
-                    else:
-                        logger.error("Failed to send alert")
                 else:
                     logger.debug("No new changes detected")
             
@@ -118,6 +129,10 @@ class DistrictWatch:
         self.config = config
         self.running = False
         
+        # Set (from the signal handler) to cut the wait between checks short
+        self._shutdown: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        
         # Shared components
         self.state: Optional[StateManager] = None
         self.browser: Optional[BrowserController] = None
@@ -127,9 +142,13 @@ class DistrictWatch:
         # Command handling
         self.command_handler: Optional[CommandHandler] = None
         self.telegram_poller: Optional[TelegramPoller] = None
+        self.telegram_webhook: Optional[TelegramWebhook] = None
         
         # Movie monitors
         self.monitors: Dict[str, MovieMonitor] = {}
+        self._check_slots = asyncio.Semaphore(config.max_concurrent_checks)
+        self._monitors_version = -1  # config.movies_version the monitors match
+        self._pending_alerts: List[Tuple[str, list, str]] = []  # Filled by monitors each round
         
         # Setup
         self._setup_logging()
@@ -177,6 +196,16 @@ class DistrictWatch:
         """Handle shutdown signals"""
         logging.info(f"Signal {signum} received, shutting down...")
         self.running = False
+        if self._loop and self._shutdown:
+            # Threadsafe call wakes the loop even while it's idle in select()
+            self._loop.call_soon_threadsafe(self._shutdown.set)
+    
+    async def _sleep(self, seconds: float) -> None:
+        """Sleep, returning early on shutdown"""
+        try:
+            await asyncio.wait_for(self._shutdown.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
     
     async def initialize(self) -> None:
         """Initialize all components"""
@@ -186,6 +215,7 @@ class DistrictWatch:
             # State manager
             self.state = StateManager(self.config.db_path)
             self.state.initialize()
+            await self.state.start_writer()
             
             # Browser
             self.browser = BrowserController(self.config)
@@ -203,7 +233,12 @@ class DistrictWatch:
             
             # Command handler (with browser for instant checks)
             self.command_handler = CommandHandler(self.config, self.notifier, self.browser)
-            self.telegram_poller = TelegramPoller(self.notifier, self.command_handler)
+            if self.config.webhook_url:
+                self.telegram_webhook = TelegramWebhook(self.notifier, self.command_handler, self.config)
+                await self.telegram_webhook.start()
+            else:
+                self.telegram_poller = TelegramPoller(self.notifier, self.command_handler)
+                await self.telegram_poller.start()
             
             # Send startup message
             active = self.config.get_active_movies()
@@ -226,6 +261,35 @@ class DistrictWatch:
         """Cleanup resources"""
         logging.info("Cleaning up...")
         
+        try:
+            if self.telegram_poller:
+                await asyncio.wait_for(self.telegram_poller.stop(), timeout=5)
+        except asyncio.TimeoutError:
+            logging.warning("Poller cleanup timed out")
+        except Exception as e:
+            logging.error(f"Poller cleanup error: {e}")
+        
+        try:
+            if self.telegram_webhook:
+                await asyncio.wait_for(self.telegram_webhook.stop(), timeout=5)
+        except asyncio.TimeoutError:
+            logging.warning("Webhook cleanup timed out")
+        except Exception as e:
+            logging.error(f"Webhook cleanup error: {e}")
+        
+        try:
+            if self.command_handler:
+                # Replies still inside their flush window go out before the
+                # notifier's session closes
+                await asyncio.wait_for(self.command_handler.flush_replies(), timeout=5)
+        except asyncio.TimeoutError:
+            logging.warning("Reply flush timed out")
+        except Exception as e:
+            logging.error(f"Reply flush error: {e}")
+        
+        if self.command_handler:
+            self.command_handler.close()
+        
         try:
             if self.notifier:
                 await asyncio.wait_for(self.notifier.close(), timeout=5)
@@ -244,12 +308,19 @@ class DistrictWatch:
         
         try:
             if self.state:
+                await self.state.stop_writer()
                 self.state.close()
         except Exception as e:
             logging.error(f"State cleanup error: {e}")
     
     def refresh_monitors(self) -> None:
         """Refresh movie monitors based on current config"""
+        # Movies only change through config methods, which bump the version
+        version = self.config.movies_version
+        if version == self._monitors_version:
+            return
+        self._monitors_version = version
+        
         active_movies = self.config.get_active_movies()
         active_ids = {m.movie_id for m in active_movies}
         
@@ -265,7 +336,8 @@ class DistrictWatch:
             'state': self.state,
             'notifier': self.notifier,
             'circuit_breaker': self.circuit_breaker,
-            'config': self.config
+            'config': self.config,
+            'pending_alerts': self._pending_alerts
         }
         
         for movie in active_movies:
@@ -273,27 +345,57 @@ class DistrictWatch:
                 self.monitors[movie.movie_id] = MovieMonitor(movie, shared)
                 logging.info(f"Added monitor: {movie.movie_id}")
     
+    async def _bounded_check(self, monitor: MovieMonitor):
+        """Run one monitor's check under the concurrency cap
+        
+        Errors are returned rather than raised so one failing movie
+        doesn't cancel the rest of the TaskGroup.
+        """
+        async with self._check_slots:
+            try:
+                return await monitor.check()
+            except Exception as e:
+                return e
+    
     async def check_all_movies(self) -> None:
         """Check all active movies"""
         if not self.monitors:
             logging.debug("No active movies to monitor")
             return
         
-        # Run checks concurrently
-        tasks = [monitor.check() for monitor in self.monitors.values()]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Run checks concurrently, at most max_concurrent_checks at a time
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(self._bounded_check(m)) for m in self.monitors.values()]
+        results = [t.result() for t in tasks]
         
         # Log summary
         success_count = sum(1 for r in results if r is True)
         logging.info(f"Check complete: {success_count}/{len(results)} successful")
+        
+        await self.flush_alerts()
+    
+    async def flush_alerts(self) -> None:
+        """Send the alerts queued during a check round as one batch"""
+        if not self._pending_alerts:
+            return
+        
+        alerts = self._pending_alerts[:]
+        self._pending_alerts.clear()
+        
+        if await self.notifier.send_booking_alerts(alerts):
+            self.state.record_alerts([
+                (theaters, f"{movie_name} alert") for movie_name, theaters, _ in alerts
+            ])
+            logging.info(f"Alert sent for {len(alerts)} movie(s)")
+        else:
+            logging.error("Failed to send alert")
     
     async def run(self) -> None:
         """Main monitoring loop"""
         self.running = True
+        self._loop = asyncio.get_running_loop()
+        self._shutdown = asyncio.Event()
         check_interval = self.config.check_interval
-        command_poll_interval = 3  # Check commands every 3 seconds
-        
-        last_command_check = 0
         
         logging.info(f"Starting monitoring loop (interval: {check_interval}s)")
         
@@ -306,27 +408,16 @@ class DistrictWatch:
                 if self.monitors:
                     await self.check_all_movies()
                 
-                # Wait with periodic command checks
-                elapsed = 0
-                while elapsed < check_interval and self.running:
-                    current_time = asyncio.get_event_loop().time()
-                    
-                    if current_time - last_command_check >= command_poll_interval:
-                        try:
-                            await self.telegram_poller.process_updates()
-                            last_command_check = current_time
-                        except Exception as e:
-                            logging.error(f"Command polling error: {e}")
-                    
-                    await asyncio.sleep(min(3, check_interval - elapsed))
-                    elapsed += 3
+                # Wait for the next check (commands are handled by the
+                # poller/webhook tasks meanwhile)
+                await self._sleep(check_interval)
                 
             except asyncio.CancelledError:
                 logging.info("Monitoring cancelled")
                 break
             except Exception as e:
                 logging.error(f"Error in monitoring loop: {e}", exc_info=True)
-                await asyncio.sleep(60)
+                await self._sleep(60)
         
         logging.info("Monitoring loop stopped")
     
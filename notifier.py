@@ -4,12 +4,99 @@ Telegram notification system with multi-user support
 
 import asyncio
 import logging
-from typing import List, Optional
+import time
+from functools import lru_cache
+from typing import List, Optional, Tuple
 from datetime import datetime
 import aiohttp
 
+from extractor import format_available_times
+
 logger = logging.getLogger(__name__)
 
+ALERT_TIME_FORMAT = '%I:%M %p, %d %b'
+
+# Bot API cap on one message's text
+TELEGRAM_MAX_LENGTH = 4096
+
+# Alerts listing more theaters than this are formatted off the event loop
+THREADED_FORMAT_THRESHOLD = 40
+
+# Bound on one Bot API send, so a stalled request fails over to a retry
+SEND_TIMEOUT = aiohttp.ClientTimeout(total=10, connect=5)
+
+# Booking alert pieces: one header and footer around a section per movie
+ALERT_HEADER = (
+    "🚨 *BOOKING ALERT* 🚨\n\n"
+    "✨ *New availability detected!* ✨\n\n"
+)
+ALERT_MOVIE = "🎬 *{movie}*\n\n"
+ALERT_ROW = "{idx}. {stars} *{name}*\n"
+ALERT_LOCATION = "   📍 _{location}_\n"
+ALERT_TIMES = "   🎬 {times}\n"
+ALERT_LINK = "🔗 [Book Now]({url})\n\n"
+ALERT_FOOTER = "⏰ {ts}"
+
+# (movie name, theaters, movie URL) for one movie's alert
+Alert = Tuple[str, List, str]
+
+
+@lru_cache(maxsize=1)
+def _format_minute(minute: int) -> str:
+    """Alert timestamp for a minute since the epoch (formatted once per minute)"""
+    return datetime.fromtimestamp(minute * 60).strftime(ALERT_TIME_FORMAT)
+
+
+def _alert_timestamp() -> str:
+    """Current time as shown in alerts"""
+    return _format_minute(int(time.time() // 60))
+
+
+def _format_movie_section(movie_name: str, theaters: List, movie_url: str) -> str:
+    """One movie's part of a booking alert, for theaters already in display order"""
+    parts = [ALERT_MOVIE.format(movie=movie_name)]
+    append = parts.append
+    
+    for idx, theater in enumerate(theaters, 1):
+        append(ALERT_ROW.format(idx=idx, stars="⭐" * theater.priority, name=theater.name))
+        
+        if theater.location:
+            append(ALERT_LOCATION.format(location=theater.location))
+        
+        # Available times
+        time_str = format_available_times(theater.showtimes)
+        if time_str:
+            append(ALERT_TIMES.format(times=time_str))
+        
+        append("\n")
+    
+    append(ALERT_LINK.format(url=movie_url))
+    return "".join(parts)
+
+
+def format_booking_alerts(alerts: List[Alert]) -> List[str]:
+    """Booking alert messages covering every movie in alerts
+    
+    Movies share one header and timestamp; a section that would take a
+    message past TELEGRAM_MAX_LENGTH starts the next message.
+    """
+    footer = ALERT_FOOTER.format(ts=_alert_timestamp())
+    budget = TELEGRAM_MAX_LENGTH - len(ALERT_HEADER) - len(footer)
+    
+    messages = []
+    sections = []
+    size = 0
+    for alert in alerts:
+        section = _format_movie_section(*alert)
+        if sections and size + len(section) > budget:
+            messages.append(ALERT_HEADER + "".join(sections) + footer)
+            sections, size = [], 0
+        sections.append(section)
+        size += len(section)
+    if sections:
+        messages.append(ALERT_HEADER + "".join(sections) + footer)
+    return messages
+
 
 class TelegramNotifier:
     """Send notifications via Telegram Bot API"""
@@ -19,17 +106,39 @@ class TelegramNotifier:
         self.base_url = f"https://api.telegram.org/bot{config.telegram_token}"
         self.chat_id = config.telegram_chat_id  # Admin chat ID
         self.session: Optional[aiohttp.ClientSession] = None
+        self.poll_session: Optional[aiohttp.ClientSession] = None
         self.message_count = 0
     
     async def initialize(self) -> None:
         """Initialize HTTP session"""
-        self.session = aiohttp.ClientSession()
+        # Keep-alive pool for sends so each message reuses a TLS
+        # connection to api.telegram.org
+        connector = aiohttp.TCPConnector(
+            limit=8,
+            limit_per_host=4,
+            keepalive_timeout=90,
+            ttl_dns_cache=300,
+            enable_cleanup_closed=True
+        )
+        self.session = aiohttp.ClientSession(connector=connector, timeout=SEND_TIMEOUT)
+        
+        # getUpdates long-polls get their own connection so they never
+        # hold up (or wait behind) outgoing messages
+        poll_connector = aiohttp.TCPConnector(
+            limit=1,
+            keepalive_timeout=90,
+            ttl_dns_cache=300,
+            enable_cleanup_closed=True
+        )
+        self.poll_session = aiohttp.ClientSession(connector=poll_connector)
         logger.info("Telegram notifier initialized")
     
     async def close(self) -> None:
         """Close HTTP session"""
         if self.session:
             await self.session.close()
+        if self.poll_session:
+            await self.poll_session.close()
     
     async def send_message(
         self,
@@ -85,52 +194,36 @@ class TelegramNotifier:
         movie_url: str
     ) -> bool:
         """Send booking availability alert to all users"""
-        if not theaters:
-            return False
-        
-        # Sort by priority
-        sorted_theaters = sorted(theaters, key=lambda t: (t.priority, t.name))
-        
-        # Build message
-        message = (
-            "🚨 *BOOKING ALERT* 🚨\n\n"
-            "✨ *New availability detected!* ✨\n\n"
-            f"🎬 *{movie_name}*\n\n"
-        )
+        return await self.send_booking_alerts([(movie_name, theaters, movie_url)])
+    
+    async def send_booking_alerts(self, alerts: List[Alert]) -> bool:
+        """Send several movies' alerts to all users, combined into as few messages as fit
         
-        for idx, theater in enumerate(sorted_theaters, 1):
-            stars = "⭐" * theater.priority
-            message += f"{idx}. {stars} *{theater.name}*\n"
-            
-            if theater.location:
-                message += f"   📍 _{theater.location}_\n"
-            
-            # Available times
-            available = [st for st in theater.showtimes if st.available]
-            if available:
-                times = [st.time for st in available[:6]]
-                time_str = ", ".join(times)
-                if len(available) > 6:
-                    time_str += f" +{len(available) - 6} more"
-                message += f"   🎬 {time_str}\n"
-            
-            message += "\n"
+        Theaters are listed in the order given, which for
+        DataExtractor.process_page_data results is already THEATER_ORDER.
+        """
+        alerts = [alert for alert in alerts if alert[1]]
+        if not alerts:
+            return False
         
-        message += (
-            f"🔗 [Book Now]({movie_url})\n\n"
-            f"⏰ {datetime.now().strftime('%I:%M %p, %d %b')}"
-        )
+        # Build messages (in a worker thread when long enough to stall the loop)
+        if sum(len(theaters) for _, theaters, _ in alerts) > THREADED_FORMAT_THRESHOLD:
+            messages = await asyncio.to_thread(format_booking_alerts, alerts)
+        else:
+            messages = format_booking_alerts(alerts)
         
         # Broadcast to all users
-        sent = await self.broadcast(message)
-        return sent > 0
+        sent = 0
+        for message in messages:
+            sent += await self.broadcast(message) > 0
+        return sent == len(messages)
     
     async def send_error_alert(self, error: str) -> bool:
         """Send error notification to admin only"""
         message = (
             "⚠️ *DistrictWatch Error*\n\n"
             f"Error: `{error}`\n\n"
-            f"⏰ {datetime.now().strftime('%I:%M %p, %d %b')}\n\n"
+            f"⏰ {_alert_timestamp()}\n\n"
             "Will retry automatically..."
         )
         return await self.send_message(message)  # Admin only
@@ -142,12 +235,12 @@ class TelegramNotifier:
                 "🛑 *Circuit Breaker Activated*\n\n"
                 "Too many consecutive failures.\n"
                 "Pausing requests temporarily.\n\n"
-                f"⏰ {datetime.now().strftime('%I:%M %p, %d %b')}"
+                f"⏰ {_alert_timestamp()}"
             )
         else:
             message = (
                 "✅ *Circuit Breaker Reset*\n\n"
                 "System recovered. Monitoring resumed.\n\n"
-                f"⏰ {datetime.now().strftime('%I:%M %p, %d %b')}"
+                f"⏰ {_alert_timestamp()}"
             )
         return await self.send_message(message)  # Admin only
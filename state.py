@@ -2,15 +2,125 @@
 State persistence using SQLite
 """
 
+import asyncio
+import queue
 import sqlite3
+import threading
 import logging
+import time
 import json
-from typing import Optional, Set
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import List, Optional, Set, Tuple
 from datetime import datetime
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Queued check records are written at most this often, this many per batch
+CHECK_FLUSH_INTERVAL = 0.2
+CHECK_BATCH_SIZE = 32
+
+# At most this many read-only connections for history queries, opened on
+# first use (WAL lets them run beside the writer)
+READER_POOL_SIZE = 4
+
+# Whole schema, applied in one transaction at startup
+_SCHEMA_SQL = """
+    BEGIN;
+    
+    CREATE TABLE IF NOT EXISTS state (
+        key TEXT PRIMARY KEY,
+        value TEXT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    
+    CREATE TABLE IF NOT EXISTS check_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+        success BOOLEAN,
+        theaters_found INTEGER,
+        error TEXT
+    );
+    
+    CREATE TABLE IF NOT EXISTS alert_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+        theaters TEXT,
+        message TEXT
+    );
+    
+    CREATE TABLE IF NOT EXISTS counters (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL DEFAULT 0
+    );
+    
+    -- Counters used to be TEXT values in state; carry them over once
+    INSERT OR IGNORE INTO counters (name, value)
+    SELECT key, CAST(value AS INTEGER) FROM state
+    WHERE key IN ('check_count', 'alert_count');
+    
+    -- History timestamps used to be CURRENT_TIMESTAMP text; make them Unix
+    -- epochs (0 for unparseable text, so cleanup still removes those rows)
+    UPDATE check_history SET timestamp = COALESCE(CAST(strftime('%s', timestamp) AS INTEGER), 0)
+    WHERE typeof(timestamp) = 'text';
+    UPDATE alert_history SET timestamp = COALESCE(CAST(strftime('%s', timestamp) AS INTEGER), 0)
+    WHERE typeof(timestamp) = 'text';
+    
+    -- Recent-history listings and cleanup both go by timestamp
+    CREATE INDEX IF NOT EXISTS idx_check_ts ON check_history(timestamp DESC);
+    CREATE INDEX IF NOT EXISTS idx_alert_ts ON alert_history(timestamp DESC);
+    
+    COMMIT;
+"""
+
+# Most recently used state values kept in memory (this process is the only writer)
+VALUE_CACHE_SIZE = 128
+_ABSENT = object()
+
+# Statements run on every check; constant text keeps them in sqlite3's statement cache
+_SQL_SET = """
+    INSERT OR REPLACE INTO state (key, value, updated_at)
+    VALUES (?, ?, CURRENT_TIMESTAMP)
+"""
+_SQL_GET = "SELECT value FROM state WHERE key = ?"
+_SQL_INCREMENT = """
+    INSERT INTO counters (name, value) VALUES (?, ?)
+    ON CONFLICT(name) DO UPDATE SET value = value + excluded.value
+"""
+# SQLite 3.35+ hands back the new total from the upsert itself
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+if _HAS_RETURNING:
+    _SQL_INCREMENT += "RETURNING value\n"
+_SQL_COUNTER = "SELECT value FROM counters WHERE name = ?"
+# History timestamps are Unix epoch seconds, set explicitly so tables created
+# before the INTEGER column default get them too
+_SQL_INSERT_CHECK = """
+    INSERT INTO check_history (timestamp, success, theaters_found, error)
+    VALUES (CAST(strftime('%s', 'now') AS INTEGER), ?, ?, ?)
+"""
+_SQL_INSERT_ALERT = """
+    INSERT INTO alert_history (timestamp, theaters, message)
+    VALUES (CAST(strftime('%s', 'now') AS INTEGER), ?, ?)
+"""
+_SQL_RECENT_CHECKS = "SELECT * FROM check_history ORDER BY timestamp DESC LIMIT ?"
+_SQL_RECENT_ALERTS = "SELECT * FROM alert_history ORDER BY timestamp DESC LIMIT ?"
+
+# Cleanup cutoffs are bound as epoch seconds so the timestamp indexes serve
+# the delete as an integer range
+_SQL_CLEANUP_CHECKS = "DELETE FROM check_history WHERE timestamp < ?"
+_SQL_CLEANUP_ALERTS = "DELETE FROM alert_history WHERE timestamp < ?"
+
+
+def _dump_names(names: list) -> str:
+    """JSON text of a name list via orjson (kept as TEXT, like json.dumps output)"""
+    return orjson.dumps(names).decode()
+
 
 class StateManager:
     """Manage persistent state in SQLite"""
@@ -18,158 +128,289 @@ class StateManager:
     def __init__(self, db_path: str):
         self.db_path = db_path
         self.conn: Optional[sqlite3.Connection] = None
+        self._batch_depth = 0
+        self._value_cache: OrderedDict = OrderedDict()
+        self._counters: dict = {}
+        self._readers: queue.SimpleQueue = queue.SimpleQueue()
+        self._reader_count = 0
+        self._reader_lock = threading.Lock()
+        self._check_queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
     
     def initialize(self) -> None:
         """Initialize database"""
         try:
-            self.conn = sqlite3.connect(self.db_path)
+            self.conn = sqlite3.connect(self.db_path, cached_statements=128)
             self.conn.row_factory = sqlite3.Row
+            self._configure()
             self._create_tables()
             logger.info(f"Database initialized: {self.db_path}")
         except Exception as e:
             logger.error(f"Database init failed: {e}")
             raise
     
+    def _configure(self) -> None:
+        """Connection pragmas"""
+        # page_size only takes effect on a new file, so it goes before WAL
+        # and the schema; cache_size (negative = KiB) holds the whole DB
+        self.conn.execute("PRAGMA page_size=4096")
+        self.conn.execute("PRAGMA cache_size=-20000")
+        if self.db_path != ":memory:":
+            # WAL: commits append to the log instead of syncing the main
+            # file, and readers don't wait on writers
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA wal_autocheckpoint=1000")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.conn.execute("PRAGMA mmap_size=268435456")
+    
+    def checkpoint(self) -> None:
+        """Fold the WAL back into the database file without blocking"""
+        try:
+            self.conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        except Exception as e:
+            logger.error(f"Checkpoint error: {e}")
+    
     def _create_tables(self) -> None:
         """Create schema"""
-        cursor = self.conn.cursor()
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS state (
-                key TEXT PRIMARY KEY,
-                value TEXT,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS check_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                success BOOLEAN,
-                theaters_found INTEGER,
-                error TEXT
-            )
-        """)
+        self.conn.executescript(_SCHEMA_SQL)
         
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS alert_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                theaters TEXT,
-                message TEXT
-            )
-        """)
+        # Planner statistics are gathered once here (close() keeps them current)
+        stats = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+        ).fetchone()
+        if stats is None:
+            self.conn.execute("ANALYZE")
+            self.conn.commit()
+    
+    def _open_reader(self) -> sqlite3.Connection:
+        """New read-only connection, usable from whichever thread borrows it"""
+        uri = Path(self.db_path).resolve().as_uri() + "?mode=ro"
+        reader = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        reader.row_factory = sqlite3.Row
+        return reader
+    
+    @contextmanager
+    def _reader(self):
+        """Borrow a pooled read-only connection (the writer for in-memory databases)"""
+        if self.db_path == ":memory:":
+            yield self.conn
+            return
         
-        self.conn.commit()
+        try:
+            reader = self._readers.get_nowait()
+        except queue.Empty:
+            with self._reader_lock:
+                can_open = self._reader_count < READER_POOL_SIZE
+                if can_open:
+                    self._reader_count += 1
+            if can_open:
+                try:
+                    reader = self._open_reader()
+                except Exception:
+                    # Give the slot back, or failed opens would exhaust the pool
+                    with self._reader_lock:
+                        self._reader_count -= 1
+                    raise
+            else:
+                # Past the pool size, wait for a connection to come back
+                reader = self._readers.get()
+        try:
+            yield reader
+        finally:
+            self._readers.put(reader)
     
     def close(self) -> None:
         """Close database"""
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
+        self._reader_count = 0
         if self.conn:
+            # Refreshes planner statistics only for tables that need it
+            try:
+                self.conn.execute("PRAGMA optimize")
+            except Exception as e:
+                logger.error(f"Optimize error: {e}")
             self.conn.close()
             logger.info("Database closed")
     
+    @contextmanager
+    def batch(self):
+        """Commit all writes made inside the block as one transaction (rolled back if it raises)"""
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.conn.rollback()
+                # Cached values may come from writes that were just undone
+                self._counters.clear()
+                self._value_cache.clear()
+            raise
+        self._batch_depth -= 1
+        if self._batch_depth == 0:
+            self.conn.commit()
+    
+    def _commit(self) -> None:
+        """Commit now, unless inside batch()"""
+        if self._batch_depth == 0:
+            self.conn.commit()
+    
     def set_value(self, key: str, value: str) -> None:
         """Set state value"""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("""
-                INSERT OR REPLACE INTO state (key, value, updated_at)
-                VALUES (?, ?, CURRENT_TIMESTAMP)
-            """, (key, value))
-            self.conn.commit()
+            self.conn.execute(_SQL_SET, (key, value))
+            self._commit()
+            self._cache_value(key, value)
         except Exception as e:
             logger.error(f"Set value error: {e}")
     
     def get_value(self, key: str, default: Optional[str] = None) -> Optional[str]:
         """Get state value"""
+        cache = self._value_cache
+        value = cache.get(key, None)
+        if value is not None or key in cache:
+            cache.move_to_end(key)
+            return default if value is _ABSENT else value
+        
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT value FROM state WHERE key = ?", (key,))
-            row = cursor.fetchone()
-            return row["value"] if row else default
+            row = self.conn.execute(_SQL_GET, (key,)).fetchone()
+            value = row["value"] if row else _ABSENT
+            self._cache_value(key, value)
+            return default if value is _ABSENT else value
         except Exception as e:
             logger.error(f"Get value error: {e}")
             return default
     
-    def record_check(self, success: bool, theaters_found: int, error: Optional[str] = None) -> None:
-        """Record check attempt"""
+    def _cache_value(self, key: str, value) -> None:
+        """Remember a value read or written, evicting the least recently used"""
+        cache = self._value_cache
+        cache[key] = value
+        cache.move_to_end(key)
+        if len(cache) > VALUE_CACHE_SIZE:
+            cache.popitem(last=False)
+    
+    def _increment(self, name: str, by: int = 1) -> None:
+        """Add to a counter in SQL, keeping the new total when SQLite returns it"""
+        cursor = self.conn.execute(_SQL_INCREMENT, (name, by))
+        if _HAS_RETURNING:
+            self._counters[name] = cursor.fetchone()[0]
+        else:
+            self._counters.pop(name, None)
+    
+    def _get_counter(self, name: str) -> int:
+        """Current value of a counter (0 if never incremented)"""
+        value = self._counters.get(name)
+        if value is not None:
+            return value
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("""
-                INSERT INTO check_history (success, theaters_found, error)
-                VALUES (?, ?, ?)
-            """, (success, theaters_found, error))
-            self.conn.commit()
-            
-            # Increment counter
-            count = int(self.get_value("check_count", "0"))
-            self.set_value("check_count", str(count + 1))
+            row = self.conn.execute(_SQL_COUNTER, (name,)).fetchone()
+            value = row["value"] if row else 0
+            self._counters[name] = value
+            return value
         except Exception as e:
-            logger.error(f"Record check error: {e}")
+            logger.error(f"Get counter error: {e}")
+            return 0
+    
+    def record_check(self, success: bool, theaters_found: int, error: Optional[str] = None) -> None:
+        """Record check attempt"""
+        self._insert_checks([(success, theaters_found, error)])
     
     def record_alert(self, theaters: list, message: str) -> None:
         """Record alert sent"""
+        self.record_alerts([(theaters, message)])
+    
+    def record_alerts(self, alerts: List[Tuple[list, str]]) -> None:
+        """Record several sent alerts, as (theaters, message) pairs, in one transaction"""
         try:
-            cursor = self.conn.cursor()
-            theater_names = json.dumps([t.name for t in theaters])
-            cursor.execute("""
-                INSERT INTO alert_history (theaters, message)
-                VALUES (?, ?)
-            """, (theater_names, message))
-            self.conn.commit()
-            
-            count = int(self.get_value("alert_count", "0"))
-            self.set_value("alert_count", str(count + 1))
+            dumps = _dump_names if orjson else json.dumps
+            rows = [(dumps([t.name for t in theaters]), message) for theaters, message in alerts]
+            with self.batch():
+                self.conn.executemany(_SQL_INSERT_ALERT, rows)
+                self._increment("alert_count", len(rows))
         except Exception as e:
             logger.error(f"Record alert error: {e}")
     
+    async def start_writer(self) -> None:
+        """Start writing check records queued by record_check_async"""
+        self._check_queue = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._write_checks())
+    
+    async def stop_writer(self) -> None:
+        """Stop the writer, flushing anything still queued"""
+        if self._writer_task:
+            self._writer_task.cancel()
+            await asyncio.gather(self._writer_task, return_exceptions=True)
+            self._writer_task = None
+        
+        pending = []
+        while self._check_queue and not self._check_queue.empty():
+            pending.append(self._check_queue.get_nowait())
+        if pending:
+            self._insert_checks(pending)
+    
+    def record_check_async(self, success: bool, theaters_found: int, error: Optional[str] = None) -> None:
+        """Queue a check record for the background writer (written now if it isn't running)"""
+        if self._writer_task is None:
+            self.record_check(success, theaters_found, error)
+        else:
+            self._check_queue.put_nowait((success, theaters_found, error))
+    
+    async def _write_checks(self) -> None:
+        """Write queued check records in batches, one commit per batch"""
+        while True:
+            batch = [await self._check_queue.get()]
+            try:
+                await asyncio.sleep(CHECK_FLUSH_INTERVAL)
+            finally:
+                # Also on cancellation, so stop_writer() doesn't lose the record
+                while len(batch) < CHECK_BATCH_SIZE and not self._check_queue.empty():
+                    batch.append(self._check_queue.get_nowait())
+                self._insert_checks(batch)
+    
+    def _insert_checks(self, rows: list) -> None:
+        """Insert check records and bump the counter in one transaction"""
+        try:
+            with self.batch():
+                self.conn.executemany(_SQL_INSERT_CHECK, rows)
+                self._increment("check_count", len(rows))
+        except Exception as e:
+            logger.error(f"Record check error: {e}")
+    
     def get_check_count(self) -> int:
         """Get total checks"""
-        return int(self.get_value("check_count", "0"))
+        return self._get_counter("check_count")
     
     def get_alert_count(self) -> int:
         """Get total alerts"""
-        return int(self.get_value("alert_count", "0"))
+        return self._get_counter("alert_count")
     
-    def get_recent_checks(self, limit: int = 10) -> list:
-        """Get recent checks"""
+    def get_recent_checks(self, limit: int = 10) -> List[sqlite3.Row]:
+        """Get recent checks (rows index by column name, like dicts)"""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("""
-                SELECT * FROM check_history
-                ORDER BY timestamp DESC LIMIT ?
-            """, (limit,))
-            return [dict(row) for row in cursor.fetchall()]
+            with self._reader() as conn:
+                return conn.execute(_SQL_RECENT_CHECKS, (limit,)).fetchall()
         except:
             return []
     
-    def get_recent_alerts(self, limit: int = 10) -> list:
-        """Get recent alerts"""
+    def get_recent_alerts(self, limit: int = 10) -> List[sqlite3.Row]:
+        """Get recent alerts (rows index by column name, like dicts)"""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("""
-                SELECT * FROM alert_history
-                ORDER BY timestamp DESC LIMIT ?
-            """, (limit,))
-            return [dict(row) for row in cursor.fetchall()]
+            with self._reader() as conn:
+                return conn.execute(_SQL_RECENT_ALERTS, (limit,)).fetchall()
         except:
             return []
     
     def cleanup_old_records(self, days: int = 30) -> None:
         """Remove old history"""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("""
-                DELETE FROM check_history
-                WHERE timestamp < datetime('now', '-' || ? || ' days')
-            """, (days,))
-            cursor.execute("""
-                DELETE FROM alert_history
-                WHERE timestamp < datetime('now', '-' || ? || ' days')
-            """, (days,))
+            cutoff = int(time.time()) - days * 86400
+            self.conn.execute(_SQL_CLEANUP_CHECKS, (cutoff,))
+            self.conn.execute(_SQL_CLEANUP_ALERTS, (cutoff,))
             self.conn.commit()
+            self.checkpoint()
             logger.info(f"Cleaned up records older than {days} days")
         except Exception as e:
             logger.error(f"Cleanup error: {e}")
@@ -1,32 +1,39 @@
 import re
-from bs4 import BeautifulSoup
+
+from selectolax.lexbor import LexborHTMLParser
+
+# Substring class selectors, matching anywhere in the class attribute
+SESSIONS = 'li[class*="MovieSessionsListing_movieSessions"]'
+TIMEBLOCKS = 'li[class*="MovieSessionsListing_timeblock"]'
+TIME_DIV = 'div[class*="MovieSessionsListing_time"]'
+VETTRI_RE = re.compile('vettri', re.IGNORECASE)
 
 with open('parasakthi-index.html', 'r', encoding='utf-8') as f:
     html = f.read()
 
-soup = BeautifulSoup(html, 'lxml')
+tree = LexborHTMLParser(html)
 
 # Find all theater listings
-theater_elements = soup.find_all('li', class_=re.compile(r'MovieSessionsListing_movieSessions'))
+theater_elements = tree.css(SESSIONS)
 print(f'Total theaters: {len(theater_elements)}')
 
-# Find Vettri specifically
-for elem in theater_elements:
-    text = elem.get_text().lower()
-    if 'vettri' in text:
+# Find Vettri specifically (one raw-text scan rules the page out before any tree walk)
+if VETTRI_RE.search(html):
+    for elem in theater_elements:
+        if not VETTRI_RE.search(elem.text()):
+            continue
         print('Found Vettri theater element!')
         # Find links
-        links = elem.find_all('a')
-        for link in links:
-            t = link.get_text(strip=True)
-            if t and 'vettri' in t.lower():
+        for link in elem.css('a'):
+            t = link.text(strip=True)
+            if t and VETTRI_RE.search(t):
                 print(f'Theater name: {t}')
         # Find timeblocks
-        timeblocks = elem.find_all('li', class_=re.compile(r'MovieSessionsListing_timeblock'))
+        timeblocks = elem.css(TIMEBLOCKS)
         print(f'Timeblocks: {len(timeblocks)}')
         for tb in timeblocks[:3]:
-            time_div = tb.find('div', class_=re.compile(r'MovieSessionsListing_time'))
+            time_div = tb.css_first(TIME_DIV)
             if time_div:
-                classes = time_div.get('class')
-                print(f'  Time div text: {time_div.get_text(strip=True)[:30]}')
+                classes = (time_div.attributes.get('class') or '').split()
+                print(f'  Time div text: {time_div.text(strip=True)[:30]}')
                 print(f'  Classes: {classes}')
@@ -0,0 +1,34 @@
+"""
+HTML extraction: the selectolax and BeautifulSoup backends must agree
+"""
+
+from pathlib import Path
+
+import pytest
+
+import extractor
+from config import TheaterConfig
+from extractor import DataExtractor
+
+SAMPLE_PAGE = Path(__file__).with_name("parasakthi-index.html")
+
+THEATERS = "Vettri:1:vettri;Rohini:1:rohini,rohini silver;AGS:1:ags;PVR:2:pvr,pvr cinemas;INOX:2:inox;SPI:2:spi,spi cinemas"
+
+
+def _extract(monkeypatch, listings, timeblocks):
+    """Theaters from the sample page with the given HTML backend"""
+    monkeypatch.setattr(extractor, "_html_listings", listings)
+    monkeypatch.setattr(extractor, "_html_timeblocks", timeblocks)
+    configs = [TheaterConfig.parse_string(spec) for spec in THEATERS.split(";")]
+    return DataExtractor(configs).extract_from_html(SAMPLE_PAGE.read_text(encoding="utf-8"))
+
+
+def test_backends_match_on_sample_page(monkeypatch):
+    pytest.importorskip("selectolax.lexbor")
+
+    soup = _extract(monkeypatch, extractor._soup_listings, extractor._soup_timeblocks)
+    lexbor = _extract(monkeypatch, extractor._lexbor_listings, extractor._lexbor_timeblocks)
+
+    assert soup
+    assert all(theater.showtimes for theater in soup)
+    assert lexbor == soup
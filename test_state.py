@@ -0,0 +1,98 @@
+"""
+StateManager schema migrations on databases from earlier versions
+"""
+
+import sqlite3
+import time
+
+from state import StateManager
+
+# Schema before counters moved to their own table and timestamps became epochs
+OLD_SCHEMA = """
+    CREATE TABLE state (
+        key TEXT PRIMARY KEY,
+        value TEXT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE check_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        success BOOLEAN,
+        theaters_found INTEGER,
+        error TEXT
+    );
+    CREATE TABLE alert_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        theaters TEXT,
+        message TEXT
+    );
+"""
+
+
+def _old_database(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(OLD_SCHEMA)
+    conn.executemany(
+        "INSERT INTO state (key, value) VALUES (?, ?)",
+        [("check_count", "12"), ("alert_count", "3")]
+    )
+    conn.executemany(
+        "INSERT INTO check_history (timestamp, success, theaters_found) VALUES (?, 1, 2)",
+        [("2024-01-15 10:30:00",), ("not a timestamp",)]
+    )
+    conn.execute(
+        "INSERT INTO alert_history (timestamp, theaters, message) VALUES (?, '[]', 'm')",
+        ("2024-01-15 10:30:00",)
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_initialize_migrates_old_database(tmp_path):
+    path = str(tmp_path / "state.db")
+    _old_database(path)
+
+    state = StateManager(path)
+    state.initialize()
+    try:
+        assert state.get_check_count() == 12
+        assert state.get_alert_count() == 3
+
+        checks = state.conn.execute(
+            "SELECT timestamp FROM check_history ORDER BY id"
+        ).fetchall()
+        assert [row["timestamp"] for row in checks] == [1705314600, 0]
+        alert = state.conn.execute("SELECT timestamp FROM alert_history").fetchone()
+        assert alert["timestamp"] == 1705314600
+
+        # New rows get epochs even though the old tables default to text
+        state.record_check(True, 1)
+        assert state.get_check_count() == 13
+        latest = state.get_recent_checks(1)[0]["timestamp"]
+        assert isinstance(latest, int) and abs(latest - time.time()) < 60
+
+        # Every migrated row is old enough to clean up
+        state.cleanup_old_records(days=30)
+        assert len(state.get_recent_checks()) == 1
+        assert state.get_recent_alerts() == []
+    finally:
+        state.close()
+
+
+def test_initialize_keeps_migrated_counters(tmp_path):
+    path = str(tmp_path / "state.db")
+    _old_database(path)
+
+    for _ in range(2):
+        state = StateManager(path)
+        state.initialize()
+        state.record_alert([], "m")
+        state.close()
+
+    state = StateManager(path)
+    state.initialize()
+    try:
+        assert state.get_alert_count() == 5
+    finally:
+        state.close()